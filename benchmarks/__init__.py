@@ -0,0 +1,53 @@
+"""
+Benchmarks for dj_waff.
+
+Run a benchmark module from the repository root, e.g.::
+
+    python -m benchmarks.render
+"""
+from __future__ import print_function
+
+import timeit
+
+
+def setup_django():
+    from django.conf import settings
+
+    if not settings.configured:
+        settings.configure(
+            DEBUG=False,
+            USE_TZ=True,
+            DATABASES={
+                "default": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": ":memory:",
+                }
+            },
+            INSTALLED_APPS=[
+                "django.contrib.auth",
+                "django.contrib.contenttypes",
+                "dj_waff",
+            ],
+        )
+        import django
+        django.setup()
+
+
+def setup_database():
+    """Creates the tables of the installed apps in the in-memory database."""
+    from django.core.management import call_command
+
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def best_of(func, number, repeat=5):
+    """Returns the best time per call of ``func`` in seconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def report(title, rows):
+    """Prints ``rows`` of (label, seconds per call) with the speedup over the first row."""
+    print(title)
+    baseline = rows[0][1]
+    for label, seconds in rows:
+        print('    {:<28} {:>10.1f} us  {:>6.1f}x'.format(label, seconds * 1e6, baseline / seconds))
@@ -0,0 +1,103 @@
+"""
+Memory allocated for the choice inputs of a radio list: Django's inputs
+against the slotted inputs of widget_compat, indexing a renderer, and
+compiled against uncached renders. Needs tracemalloc and importlib.util
+(Python 3.5+).
+
+widget_compat only defines the slotted inputs on Django 1.11 and later,
+which removed RadioChoiceInput; on older versions the widgets use Django's
+inputs, which are measured against widget_compat loaded without them.
+"""
+from __future__ import print_function
+
+import sys
+
+from benchmarks import setup_django
+
+setup_django()
+
+from django.forms import widgets  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherRenderer, OTHER_CHOICE  # noqa: E402
+from dj_waff.choice_with_other import widget_compat  # noqa: E402
+
+if sys.version_info >= (3, 5):
+    import importlib.util
+    import tracemalloc
+
+SIZE = 1000
+CHOICES = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(SIZE)] + [(OTHER_CHOICE, '')]
+
+
+def load_fallback_compat():
+    """Loads the widget_compat classes used when Django doesn't provide them."""
+    if widget_compat.RadioChoiceInput is not getattr(widgets, 'RadioChoiceInput', None):
+        return widget_compat
+    provided = widgets.RadioChoiceInput
+    del widgets.RadioChoiceInput
+    try:
+        spec = importlib.util.spec_from_file_location('widget_compat_fallback', widget_compat.__file__)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        widgets.RadioChoiceInput = provided
+    return module
+
+
+def allocated(func):
+    """Returns the bytes and blocks still allocated by the result of ``func``."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = func()  # noqa: F841
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, 'filename')
+    return sum(stat.size_diff for stat in stats), sum(stat.count_diff for stat in stats)
+
+
+def peak(func):
+    """Returns the peak bytes allocated while ``func`` runs."""
+    tracemalloc.start()
+    func()
+    peak_size = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak_size
+
+
+def print_rows(title, rows, unit='KiB'):
+    print(title)
+    for row in rows:
+        print('    {:<28} {:>10.1f} {}'.format(row[0], row[1] / 1024, unit) +
+              ('  {:>8} blocks'.format(row[2]) if len(row) > 2 else ''))
+
+
+def main():
+    if sys.version_info < (3, 5):
+        print('tracemalloc and importlib.util need Python 3.5.')
+        return
+    fallback = load_fallback_compat()
+    input_classes = [('slotted RadioChoiceInput', fallback.RadioChoiceInput)]
+    if hasattr(widgets, 'RadioChoiceInput'):
+        input_classes.insert(0, ('django RadioChoiceInput', widgets.RadioChoiceInput))
+    rows = []
+    for label, input_class in input_classes:
+        size, count = allocated(lambda: [input_class('field', 'choice1', {'id': 'id_field'}, choice, i)
+                                         for i, choice in enumerate(CHOICES)])
+        rows.append((label, size, count))
+    print_rows('{} choice inputs'.format(len(CHOICES)), rows)
+
+    renderer = ChoiceWithOtherRenderer('field', 'choice1', {'id': 'id_field'}, CHOICES)
+    print_rows('Peak memory of renderer[500]', [
+        ('list(renderer)[500]', peak(lambda: list(renderer)[500])),
+        ('renderer[500]', peak(lambda: renderer[500])),
+    ])
+
+    renderer.render()
+    print_rows('Peak memory of rendering {} choices'.format(len(CHOICES)), [
+        ('render_uncached()', peak(renderer.render_uncached)),
+        ('render() (compiled)', peak(renderer.render)),
+    ])
+
+
+if __name__ == '__main__':
+    main()
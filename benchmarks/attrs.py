@@ -0,0 +1,72 @@
+"""
+Per-render cost of ChoiceWithOtherRenderer: wall time and the number of
+attrs dicts built by the renderer and the choice inputs, for the uncached
+render (one input per choice), a compiled render whose list of choices is
+frozen into the cache key on every call and a compiled render of frozen
+(tuple) choices, as ChoiceWithOtherField uses.
+
+The dicts are counted by replacing ``dict`` in the modules that build attrs
+with a counting subclass, whose copies are counted too.
+"""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django.forms import widgets  # noqa: E402
+
+from dj_waff import choice_with_other  # noqa: E402
+from dj_waff.choice_with_other import ChoiceWithOtherRenderer, OTHER_CHOICE, widget_compat  # noqa: E402
+from dj_waff.choice_with_other.choices import freeze_choices  # noqa: E402
+
+ATTRS = {'id': 'id_field_0', 'class': 'radio', 'data-toggle': 'choice'}
+
+# Modules whose dict(...) calls build the attrs of the renderer and of the
+# choice inputs.
+ATTRS_MODULES = (choice_with_other, widget_compat, widgets)
+
+
+class CountedDict(dict):
+    count = 0
+
+    def __init__(self, *args, **kwargs):
+        CountedDict.count += 1
+        super(CountedDict, self).__init__(*args, **kwargs)
+
+    def copy(self):
+        return CountedDict(self)
+
+
+def count_dicts(func):
+    """Returns the number of attrs dicts built by one call of ``func``."""
+    for module in ATTRS_MODULES:
+        module.dict = CountedDict
+    try:
+        CountedDict.count = 0
+        func()
+        return CountedDict.count
+    finally:
+        for module in ATTRS_MODULES:
+            del module.dict
+
+
+def main():
+    for size in (10, 100, 1000):
+        choices = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(size)] + [(OTHER_CHOICE, '')]
+        list_renderer = ChoiceWithOtherRenderer('field_0', 'choice1', CountedDict(ATTRS), choices)
+        frozen_renderer = ChoiceWithOtherRenderer('field_0', 'choice1', CountedDict(ATTRS), freeze_choices(choices))
+        list_renderer.render()
+        number = max(10, 10000 // size)
+        cases = [
+            ('render_uncached()', list_renderer.render_uncached),
+            ('render(), list choices', list_renderer.render),
+            ('render(), frozen choices', frozen_renderer.render),
+        ]
+        report('Rendering {} choices'.format(size), [(label, best_of(func, number=number)) for label, func in cases])
+        for label, func in cases:
+            print('    {:<28} {:>10} attrs dicts'.format(label, count_dicts(func)))
+
+
+if __name__ == '__main__':
+    main()
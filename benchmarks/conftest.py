@@ -0,0 +1,21 @@
+"""
+Configuration of the pytest-benchmark suite in test_suite.py, run from the
+repository root with ``python -m pytest benchmarks``.
+"""
+import pytest
+
+from benchmarks import setup_database, setup_django
+
+setup_django()
+
+GROUPS = 100
+
+
+@pytest.fixture(scope='session')
+def groups():
+    """Creates the tables and GROUPS groups, the choices of the ModelChoiceField "other" fields."""
+    from django.contrib.auth.models import Group
+
+    setup_database()
+    Group.objects.bulk_create([Group(name='group{}'.format(i)) for i in range(GROUPS)])
+    return list(Group.objects.order_by('pk'))
@@ -0,0 +1,94 @@
+"""
+Constructing forms of ChoiceWithOtherFields: time and memory of the field
+copies, with Django's deepcopy of the choices and subwidgets and with shallow
+copies of the lists of choices.
+"""
+from __future__ import print_function
+
+import copy
+import tracemalloc
+from contextlib import contextmanager
+
+from benchmarks import best_of, report, setup_database, setup_django
+
+setup_django()
+setup_database()
+
+from django import forms  # noqa: E402
+from django.contrib.auth.models import Group  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField, ChoiceWithOtherWidget  # noqa: E402
+from dj_waff.choice_with_other.choices import FrozenChoices, IndexedChoiceField  # noqa: E402
+
+FORMS = 100
+
+
+def copy_choices(choices, memo=None):
+    """Copies FrozenChoices like the list of choices Django copies."""
+    copied = FrozenChoices(copy.deepcopy(list(choices), memo))
+    copied.version = choices.version
+    return copied
+
+
+@contextmanager
+def django_deepcopy():
+    """Copies fields, widgets and choices the way Django does by default."""
+    patched = [
+        (IndexedChoiceField, '__deepcopy__', forms.ChoiceField.__deepcopy__),
+        (ChoiceWithOtherWidget, '__deepcopy__', forms.MultiWidget.__deepcopy__),
+        (FrozenChoices, '__deepcopy__', copy_choices),
+        (FrozenChoices, '__copy__', copy_choices),
+    ]
+    originals = [(cls, name, cls.__dict__[name]) for cls, name, _ in patched]
+    for cls, name, method in patched:
+        setattr(cls, name, method)
+    try:
+        yield
+    finally:
+        for cls, name, method in originals:
+            setattr(cls, name, method)
+
+
+@contextmanager
+def _nothing():
+    yield
+
+
+def form_class(size):
+    choices = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(size)]
+    grouped = [('group{}'.format(i), choices[i:i + 10]) for i in range(0, size, 10)]
+    return type(str('Form{}'.format(size)), (forms.Form,), {
+        'kind': ChoiceWithOtherField(choices=choices, other_form_field=forms.CharField()),
+        'grouped': ChoiceWithOtherField(choices=grouped, other_form_field=forms.CharField()),
+        'group': ChoiceWithOtherField(
+            choices=choices,
+            other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()),
+        ),
+    })
+
+
+def allocated_per_form(cls):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [cls() for _ in range(FORMS)]  # noqa: F841
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    return sum(stat.size_diff for stat in after.compare_to(before, 'filename')) / FORMS
+
+
+def main():
+    for size in (10, 100, 1000):
+        cls = form_class(size)
+        rows = []
+        memory = []
+        for label, context in (('django deepcopy', django_deepcopy), ('shallow choices', _nothing)):
+            with context():
+                rows.append((label, best_of(lambda: copy.deepcopy(cls.base_fields), number=200)))
+                memory.append((label, allocated_per_form(cls)))
+        report('Copying 3 fields with {} choices'.format(size), rows)
+        for label, size_diff in memory:
+            print('    {:<28} {:>10.1f} KiB per form'.format(label, size_diff / 1024))
+
+
+if __name__ == '__main__':
+    main()
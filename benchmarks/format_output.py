@@ -0,0 +1,36 @@
+"""ChoiceWithOtherWidget.render against the former double str.format assembly."""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django import forms  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField  # noqa: E402
+
+
+def legacy_format_output(rendered_widgets):
+    ret = u'<div class="choice_with_other_wrapper" style="display: table-row;">{choices_fields}</div>'.format(
+        choices_fields=rendered_widgets[0])
+    ret = ret.format(other_form_field=rendered_widgets[1])
+    return ret
+
+
+def main():
+    for count in (10, 100, 1000, 10000):
+        choices = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(count)]
+        widget = ChoiceWithOtherField(choices=choices, other_form_field=forms.CharField()).widget
+        rendered = [widget.widgets[0].render('field_0', 'choice5', {'id': 'id_field_0'}),
+                    widget.widgets[1].render('field_1', '', {'id': 'id_field_1'})]
+        output = widget.render('field', 'choice5', {'id': 'id_field'})
+        assert legacy_format_output(rendered) == output
+        number = max(10, 10000 // count)
+        report('{} choices, {} bytes of output'.format(count, len(output.encode('utf-8'))), [
+            ('double str.format', best_of(lambda: legacy_format_output(rendered), number)),
+            ('single pass', best_of(lambda: widget.format_output(rendered), number)),
+        ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""Rendering formsets of ChoiceWithOtherFields, per row, with and without shared state."""
+from __future__ import print_function
+
+from benchmarks import best_of, setup_database, setup_django
+
+setup_django()
+setup_database()
+
+from django import forms  # noqa: E402
+from django.contrib.auth.models import Group  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField  # noqa: E402
+from dj_waff.choice_with_other.formsets import BaseChoiceWithOtherFormSet  # noqa: E402
+
+CHOICES = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(50)]
+
+
+class RowForm(forms.Form):
+    kind = ChoiceWithOtherField(choices=CHOICES, other_form_field=forms.CharField())
+    group = ChoiceWithOtherField(
+        choices=CHOICES,
+        other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()),
+    )
+
+
+def main():
+    Group.objects.bulk_create([Group(name='group{}'.format(i)) for i in range(50)])
+    for base in (forms.BaseFormSet, BaseChoiceWithOtherFormSet):
+        print(base.__name__)
+        formset_class = forms.formset_factory(RowForm, formset=base, extra=0)
+        for rows in (10, 100, 1000):
+            initial = [{'kind': 'choice{}'.format(i % 50), 'group': 'choice3'} for i in range(rows)]
+            seconds = best_of(lambda: formset_class(initial=initial).as_p(), number=1, repeat=3)
+            print('    {:>5} rows  {:>10.1f} ms  {:>8.1f} us/row'.format(rows, seconds * 1e3, seconds / rows * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Import time of dj_waff.choice_with_other in a fresh interpreter, on top of
+django.forms, read from ``python -X importtime`` (Python 3.7+). Prints the
+self time of each dj_waff module and exits with status 1 when the package
+takes more than ``--budget`` of the import time of django.forms::
+
+    python -m benchmarks.import_time --budget 0.08
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import subprocess
+import sys
+
+IMPORT_SCRIPT = '''
+from django.conf import settings
+settings.configure()
+import django
+django.setup()
+import django.forms
+import dj_waff.choice_with_other
+'''
+
+# With .pyc files the package takes about 5% of the import time of
+# django.forms on Django 2.2, which uses the widget_compat fallback.
+IMPORT_TIME_RATIO = 0.08
+
+RUNS = 10
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_importtime():
+    """Returns {module: (self us, cumulative us)} of one ``-X importtime`` run of IMPORT_SCRIPT."""
+    # Deployed workers load the .pyc files, the first run writes them.
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', IMPORT_SCRIPT], cwd=ROOT, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    out, err = process.communicate()
+    if process.returncode:
+        raise RuntimeError(err)
+    times = {}
+    for line in err.splitlines():
+        if line.startswith('import time:'):
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            if self_us.strip().isdigit():
+                times[module.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--budget', type=float, default=IMPORT_TIME_RATIO,
+                        help='largest import time of the package relative to django.forms')
+    parser.add_argument('--runs', type=int, default=RUNS, help='runs, the best one is kept')
+    options = parser.parse_args(argv)
+    if sys.version_info < (3, 7):
+        print('-X importtime needs Python 3.7.')
+        return 0
+
+    run_importtime()
+    runs = [run_importtime() for _ in range(options.runs)]
+    modules = sorted(module for module in runs[0] if module.split('.')[0] == 'dj_waff')
+    for module in modules:
+        print('    {:<44} {:>8} us'.format(module, min(run[module][0] for run in runs)))
+    # dj_waff.choice_with_other imports the other dj_waff modules, its
+    # cumulative time covers the whole package.
+    ratio = min(run['dj_waff.choice_with_other'][1] / float(run['django.forms'][1]) for run in runs)
+    print('dj_waff.choice_with_other: {:.1%} of the import time of django.forms (best of {}), budget {:.1%}'.format(
+        ratio, options.runs, options.budget))
+    return 1 if ratio > options.budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
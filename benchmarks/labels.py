@@ -0,0 +1,53 @@
+"""
+Rendering 500 lazily translated choices, cycling through 3 languages, with
+the labels resolved on every render (a plain list of choices) and once per
+choices version and language (frozen choices, as ChoiceWithOtherField uses).
+"""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django import forms  # noqa: E402
+from django.utils import translation  # noqa: E402
+from django.utils.translation import ugettext_lazy  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField, ChoiceWithOtherRenderer, OTHER_CHOICE  # noqa: E402
+from dj_waff.choice_with_other.choices import freeze_choices  # noqa: E402
+
+SIZE = 500
+LANGUAGES = ('en', 'fr', 'de')
+
+
+def in_each_language(func):
+    def wrapper():
+        for language in LANGUAGES:
+            with translation.override(language):
+                func()
+    return wrapper
+
+
+def main():
+    choices = [('choice{}'.format(i), ugettext_lazy('Choice {}'.format(i))) for i in range(SIZE)]
+    choices.append((OTHER_CHOICE, ugettext_lazy('Other')))
+    list_renderer = ChoiceWithOtherRenderer('field_0', 'choice1', {'id': 'id_field_0'}, choices)
+    frozen_renderer = ChoiceWithOtherRenderer('field_0', 'choice1', {'id': 'id_field_0'}, freeze_choices(choices))
+    report('render() of {} lazy labels in {} languages'.format(SIZE, len(LANGUAGES)), [
+        ('labels resolved per render', best_of(in_each_language(list_renderer.render), number=20)),
+        ('labels resolved per language', best_of(in_each_language(frozen_renderer.render), number=20)),
+    ])
+
+    field = ChoiceWithOtherField(choices=choices[:-1], other_form_field=forms.CharField())
+    widget = field.widget
+    frozen_choices = widget.widgets[0].choices
+    rows = []
+    for label, widget_choices in (('labels resolved per render', list(frozen_choices)),
+                                  ('labels resolved per language', frozen_choices)):
+        widget.widgets[0].choices = widget_choices
+        rows.append((label, best_of(in_each_language(lambda: widget.get_context('field', 'choice1')), number=20)))
+    report('get_context() of {} lazy labels in {} languages'.format(SIZE, len(LANGUAGES)), rows)
+
+
+if __name__ == '__main__':
+    main()
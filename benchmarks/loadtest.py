@@ -0,0 +1,224 @@
+"""
+Load test of the example project: a pool of client processes calls its WSGI
+application directly, without sockets, against a SQLite database seeded with
+``--rows`` DocumentTemplates. Reports the requests per second, the p50, p95
+and p99 latencies and the queries per request of each scenario::
+
+    python -m benchmarks.loadtest --rows 10000 --processes 4 --requests 2000
+"""
+from __future__ import division, print_function
+
+import argparse
+import io
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import timeit
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # Python 2
+    from urllib import urlencode
+
+from wsgiref.util import setup_testing_defaults
+
+EXAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'example')
+
+CSRF_TOKEN_RE = re.compile(r'name=["\']csrfmiddlewaretoken["\'] value=["\']([^"\']+)')
+
+# Expected status of each scenario, checked during the warm up.
+SCENARIOS = [
+    ('get', 200),
+    ('post-valid', 302),
+    ('post-invalid', 200),
+    ('autocomplete', 200),
+]
+
+
+def setup_django(database):
+    """Sets up the example project on ``database``, with DEBUG off."""
+    sys.path.insert(0, EXAMPLE)
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'example.settings'
+    from django.conf import settings
+
+    settings.DEBUG = False
+    settings.DATABASES['default']['NAME'] = database
+    import django
+    django.setup()
+
+
+def seed_database(rows):
+    """Creates the tables and ``rows`` DocumentTemplates."""
+    from django.core.management import call_command
+    from django.db import connections
+    from core.models import DocumentTemplate
+
+    call_command('migrate', verbosity=0)
+    DocumentTemplate.objects.bulk_create(
+        [DocumentTemplate(name='Template {}'.format(i)) for i in range(rows)], batch_size=500)
+    # The client processes open their own connections.
+    connections.close_all()
+
+
+class WSGIClient(object):
+    """Calls a WSGI application with hand-built environs and keeps the CSRF cookie."""
+
+    def __init__(self, application):
+        self.application = application
+        self.cookie = ''
+        self.csrf_token = ''
+
+    def request(self, method, path, query=None, data=None):
+        body = urlencode(data or {}).encode('ascii')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': urlencode(query or {}),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'HTTP_COOKIE': self.cookie,
+            'wsgi.input': io.BytesIO(body),
+        }
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = headers
+
+        result = self.application(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        for name, value in response['headers']:
+            value = value.strip()
+            if name.lower() == 'set-cookie' and value.startswith('csrftoken='):
+                self.cookie = value.split(';', 1)[0]
+        return response['status'], content
+
+    def get_csrf_token(self):
+        status, content = self.request('GET', '/')
+        self.csrf_token = CSRF_TOKEN_RE.search(content.decode('utf-8')).group(1)
+
+
+class Worker(object):
+    """The requests of each scenario, made by one client process."""
+
+    def __init__(self, rows):
+        from django.db import connection
+        from example.wsgi import application
+
+        self.rows = rows
+        self.connection = connection
+        self.client = WSGIClient(application)
+        self.client.get_csrf_token()
+
+    def valid_data(self, i):
+        pk = i % self.rows + 1
+        return {
+            'csrfmiddlewaretoken': self.client.csrf_token,
+            'document_template_0': '__other__',
+            'document_template_1': pk,
+            'document_template2_0': 'choice1',
+            'document_template3_0': 'choice2',
+            'document_template4_0': '__other__',
+            'document_template4_1': 'text {}'.format(i),
+            'document_template5_0': 'choice1',
+            'document_template6_0': '__other__',
+            'document_template6_1': 'text {}'.format(i),
+            'maria': pk,
+            'teste': 'choice1',
+        }
+
+    def call(self, scenario, i):
+        if scenario == 'get':
+            return self.client.request('GET', '/')
+        if scenario == 'post-valid':
+            return self.client.request('POST', '/', data=self.valid_data(i))
+        if scenario == 'post-invalid':
+            return self.client.request('POST', '/', data={'csrfmiddlewaretoken': self.client.csrf_token})
+        return self.client.request('GET', '/~a', query={'q': 'template {}'.format(i % 10)})
+
+    def run(self, scenario, expected_status, requests, warmup):
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(warmup):
+            status, content = self.call(scenario, i)
+            if status != expected_status:
+                raise AssertionError('{} returned {} instead of {}:\n{}'.format(
+                    scenario, status, expected_status, content.decode('utf-8', 'replace')[:2000]))
+        latencies = []
+        queries = 0
+        start = timeit.default_timer()
+        for i in range(requests):
+            with CaptureQueriesContext(self.connection) as captured:
+                before = timeit.default_timer()
+                self.call(scenario, i)
+                latencies.append(timeit.default_timer() - before)
+            queries += len(captured)
+        return start, timeit.default_timer(), latencies, queries
+
+
+_worker = None
+
+
+def init_worker(rows):
+    global _worker
+    _worker = Worker(rows)
+
+
+def run_worker(args):
+    return _worker.run(*args)
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, int(round(percent / 100 * len(sorted_values))) - 1)
+    return sorted_values[index]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1000, help='DocumentTemplates in the database')
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count(), help='client processes')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per process and scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests per process and scenario')
+    parser.add_argument('--scenario', action='append', choices=[name for name, status in SCENARIOS],
+                        help='scenario to run, may be repeated (default: all)')
+    options = parser.parse_args(argv)
+
+    directory = tempfile.mkdtemp(prefix='dj_waff_loadtest')
+    try:
+        setup_django(os.path.join(directory, 'db.sqlite3'))
+        seed_database(options.rows)
+        print('{} DocumentTemplates, {} processes x {} requests'.format(
+            options.rows, options.processes, options.requests))
+        print('    {:<14} {:>9} {:>9} {:>9} {:>9} {:>9}'.format(
+            'scenario', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries'))
+        pool = multiprocessing.Pool(options.processes, init_worker, (options.rows,))
+        try:
+            for name, status in SCENARIOS:
+                if options.scenario and name not in options.scenario:
+                    continue
+                results = pool.map(
+                    run_worker, [(name, status, options.requests, options.warmup)] * options.processes, chunksize=1)
+                latencies = sorted(latency for result in results for latency in result[2])
+                seconds = max(result[1] for result in results) - min(result[0] for result in results)
+                queries = sum(result[3] for result in results)
+                print('    {:<14} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f}'.format(
+                    name, len(latencies) / seconds, percentile(latencies, 50) * 1e3,
+                    percentile(latencies, 95) * 1e3, percentile(latencies, 99) * 1e3, queries / len(latencies)))
+        finally:
+            pool.close()
+            pool.join()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
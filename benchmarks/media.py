@@ -0,0 +1,51 @@
+"""
+Accessing ``form.media`` of forms with 50 to 200 widgets: ChoiceWithOtherFields
+sharing one script, plus autocomplete-like widgets with a script each.
+Compares Django's Form.media, which adds up the media of every widget on each
+access, with merge_media(), which CachedMediaMixin uses on the first access,
+and with CachedMediaMixin.
+"""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django import forms  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField  # noqa: E402
+from dj_waff.choice_with_other.media import CachedMediaMixin, merge_media  # noqa: E402
+
+
+def autocomplete_widget(i):
+    media = type(str('Media'), (), {'js': ('autocomplete/base.js', 'autocomplete/widget{}.js'.format(i))})
+    return type(str('AutocompleteWidget{}'.format(i)), (forms.TextInput,), {'Media': media})()
+
+
+def form_fields(size):
+    fields = {}
+    for i in range(size):
+        if i % 5:
+            fields['field{}'.format(i)] = ChoiceWithOtherField(
+                choices=[('a', 'A'), ('b', 'B')], other_form_field=forms.CharField())
+        else:
+            fields['field{}'.format(i)] = forms.CharField(widget=autocomplete_widget(i))
+    return fields
+
+
+def main():
+    for size in (50, 100, 200):
+        fields = form_fields(size)
+        form = type(str('MediaForm'), (forms.Form,), dict(fields))()
+        cached_form = type(str('CachedMediaForm'), (CachedMediaMixin, forms.Form), dict(fields))()
+        rows = [
+            ('Form.media', best_of(lambda: form.media, number=20)),
+            ('merge_media()', best_of(lambda: merge_media([f.widget.media for f in form.fields.values()]),
+                                      number=20)),
+            ('CachedMediaMixin.media', best_of(lambda: cached_form.media, number=20)),
+        ]
+        report('form.media of {} widgets ({} scripts)'.format(size, len(form.media._js)), rows)
+
+
+if __name__ == '__main__':
+    main()
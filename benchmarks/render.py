@@ -0,0 +1,26 @@
+"""ChoiceWithOtherRenderer.render with and without the fragment cache."""
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from dj_waff.choice_with_other import ChoiceWithOtherRenderer, OTHER_CHOICE  # noqa: E402
+
+
+def make_choices(count):
+    return [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(count)] + [(OTHER_CHOICE, '')]
+
+
+def main():
+    for count in (10, 100, 1000):
+        choices = make_choices(count)
+        renderer = ChoiceWithOtherRenderer('field_0', 'choice5', {'id': 'id_field_0'}, choices)
+        renderer.render()
+        number = max(10, 10000 // count)
+        report('{} choices'.format(count), [
+            ('render_uncached()', best_of(renderer.render_uncached, number)),
+            ('render() (cached)', best_of(renderer.render, number)),
+        ])
+
+
+if __name__ == '__main__':
+    main()
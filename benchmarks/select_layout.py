@@ -0,0 +1,34 @@
+"""
+Rendering ChoiceWithOtherWidget as a radio list and as a select (its options
+compiled once per choices version), comparing the time per render and the
+size of the markup.
+"""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django import forms  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField  # noqa: E402
+
+
+def main():
+    for size in (10, 100, 1000, 5000):
+        choices = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(size)]
+        number = max(3, 1000 // size)
+        rows = []
+        sizes = []
+        for label, select_layout in (('radio list', False), ('select', True)):
+            field = ChoiceWithOtherField(choices=choices, other_form_field=forms.CharField(),
+                                         select_layout=select_layout)
+            widget = field.widget
+            render = lambda: widget.render('field', 'choice1', {'id': 'id_field'})  # noqa: E731
+            rows.append((label, best_of(render, number=number)))
+            sizes.append('{} {} bytes'.format(label, len(render().encode('utf-8'))))
+        report('render() of {} choices ({})'.format(size, ', '.join(sizes)), rows)
+
+
+if __name__ == '__main__':
+    main()
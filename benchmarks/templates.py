@@ -0,0 +1,71 @@
+"""
+Rendering ChoiceWithOtherWidget with the compiled markup, the legacy
+string-building renderer, Django templates (with and without the cached
+loader) and Jinja2 templates.
+"""
+from __future__ import print_function
+
+from benchmarks import best_of, report, setup_django
+
+setup_django()
+
+from django import forms  # noqa: E402
+from django.template.backends.django import DjangoTemplates  # noqa: E402
+
+from dj_waff.choice_with_other import ChoiceWithOtherField  # noqa: E402
+
+try:
+    from django.template.backends.jinja2 import Jinja2
+except ImportError:
+    Jinja2 = None
+
+TEMPLATE_NAME = 'dj_waff/choice_with_other/widget.html'
+APP_DIRECTORIES_LOADER = 'django.template.loaders.app_directories.Loader'
+
+
+class EngineRenderer(object):
+    def __init__(self, engine):
+        self.engine = engine
+
+    def render(self, template_name, context):
+        return self.engine.get_template(template_name).render(context)
+
+
+def renderers():
+    yield 'django templates', EngineRenderer(DjangoTemplates({
+        'NAME': 'django', 'DIRS': [], 'APP_DIRS': False,
+        'OPTIONS': {'loaders': [APP_DIRECTORIES_LOADER]},
+    }))
+    yield 'django cached loader', EngineRenderer(DjangoTemplates({
+        'NAME': 'django-cached', 'DIRS': [], 'APP_DIRS': False,
+        'OPTIONS': {'loaders': [('django.template.loaders.cached.Loader', [APP_DIRECTORIES_LOADER])]},
+    }))
+    if Jinja2 is None:
+        print('Jinja2 is not installed, skipping it.')
+    else:
+        yield 'jinja2', EngineRenderer(Jinja2({'NAME': 'jinja2', 'DIRS': [], 'APP_DIRS': True, 'OPTIONS': {}}))
+
+
+def main():
+    for size in (10, 100, 1000):
+        choices = [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(size)]
+        field = ChoiceWithOtherField(choices=choices, other_form_field=forms.CharField())
+        widget = field.widget
+        renderer = widget.widgets[0].get_renderer('field_0', 'choice1', {'id': 'id_field_0'})
+        number = max(3, 1000 // size)
+        rows = [
+            ('compiled', best_of(lambda: widget.render('field', 'choice1', {'id': 'id_field'}), number=number)),
+            ('legacy string building', best_of(renderer.render_uncached, number=number)),
+        ]
+        widget.template_name = TEMPLATE_NAME
+        for label, template_renderer in renderers():
+            rows.append((label, best_of(
+                lambda: widget.render('field', 'choice1', {'id': 'id_field'}, renderer=template_renderer),
+                number=number,
+            )))
+        widget.template_name = None
+        report('Rendering {} choices'.format(size), rows)
+
+
+if __name__ == '__main__':
+    main()
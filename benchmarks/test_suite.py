@@ -0,0 +1,146 @@
+"""
+Benchmark suite of ChoiceWithOtherRenderer, ChoiceWithOtherWidget,
+ChoiceWithOtherField and whole forms, parametrized over the number of
+choices, the number of fields per form and the type of the "other" field
+(a CharField, or a ModelChoiceField of groups in SQLite).
+
+Save a baseline with ``--benchmark-save=<name>`` and compare a later run
+with ``--benchmark-compare --benchmark-compare-fail=median:25%``, see
+docs/usage.rst.
+"""
+import pytest
+
+from django import forms
+
+from dj_waff.choice_with_other import ChoiceWithOtherField, OTHER_CHOICE
+
+CHOICE_COUNTS = (10, 100, 1000)
+FIELD_COUNTS = (1, 10, 50)
+OTHER_FIELDS = ('char', 'model')
+
+
+def make_choices(count):
+    return [('choice{}'.format(i), 'Choice {}'.format(i)) for i in range(count)]
+
+
+def make_field(choice_count, other_field):
+    if other_field == 'model':
+        from django.contrib.auth.models import Group
+
+        other_form_field = forms.ModelChoiceField(queryset=Group.objects.all())
+    else:
+        other_form_field = forms.CharField()
+    return ChoiceWithOtherField(choices=make_choices(choice_count), other_form_field=other_form_field)
+
+
+def other_value(other_field, groups):
+    return str(groups[1].pk) if other_field == 'model' else 'free text'
+
+
+def make_form_class(field_count, choice_count, other_field):
+    fields = dict(('field{}'.format(i), make_field(choice_count, other_field)) for i in range(field_count))
+    return type(str('BenchmarkForm'), (forms.Form,), fields)
+
+
+def make_form_data(field_count, other_field, groups):
+    """Half the fields with a provided choice, half with an "other" value."""
+    data = {}
+    for i in range(field_count):
+        if i % 2:
+            data['field{}_0'.format(i)] = OTHER_CHOICE
+            data['field{}_1'.format(i)] = other_value(other_field, groups)
+        else:
+            data['field{}_0'.format(i)] = 'choice{}'.format(i % 10)
+    return data
+
+
+@pytest.fixture(params=CHOICE_COUNTS, ids='{}choices'.format)
+def choice_count(request):
+    return request.param
+
+
+@pytest.fixture(params=FIELD_COUNTS, ids='{}fields'.format)
+def field_count(request):
+    return request.param
+
+
+@pytest.fixture(params=OTHER_FIELDS)
+def other_field(request, groups):
+    return request.param
+
+
+# ChoiceWithOtherRenderer
+
+def test_renderer_render(benchmark, choice_count):
+    widget = make_field(choice_count, 'char').widget
+    renderer = widget.widgets[0].get_renderer('field_0', 'choice5', {'id': 'id_field_0'})
+    benchmark(renderer.render)
+
+
+def test_renderer_render_uncached(benchmark, choice_count):
+    widget = make_field(choice_count, 'char').widget
+    renderer = widget.widgets[0].get_renderer('field_0', 'choice5', {'id': 'id_field_0'})
+    # The renderer of the stored baseline has no cache, render() is uncached.
+    benchmark(getattr(renderer, 'render_uncached', renderer.render))
+
+
+# ChoiceWithOtherWidget
+
+@pytest.mark.parametrize('value', ['choice5', 'free text'])
+def test_widget_decompress(benchmark, choice_count, value):
+    widget = make_field(choice_count, 'char').widget
+    benchmark(widget.decompress, value)
+
+
+def test_widget_format_output(benchmark, choice_count):
+    widget = make_field(choice_count, 'char').widget
+    rendered = [widget.widgets[0].render('field_0', 'choice5', {'id': 'id_field_0'}),
+                widget.widgets[1].render('field_1', '', {'id': 'id_field_1'})]
+    benchmark(widget.format_output, rendered)
+
+
+def test_widget_render(benchmark, choice_count, other_field, groups):
+    widget = make_field(choice_count, other_field).widget
+    html = benchmark(widget.render, 'field', other_value(other_field, groups), {'id': 'id_field'})
+    assert html.count('checked="checked"') == 1
+
+
+# ChoiceWithOtherField
+
+@pytest.mark.parametrize('kind', ['choice', 'other'])
+def test_field_clean(benchmark, choice_count, other_field, groups, kind):
+    field = make_field(choice_count, other_field)
+    value = ['choice5', ''] if kind == 'choice' else [OTHER_CHOICE, other_value(other_field, groups)]
+    assert benchmark(field.clean, value)[0] == value[0]
+
+
+@pytest.mark.parametrize('kind', ['choice', 'other'])
+def test_field_compress(benchmark, choice_count, other_field, groups, kind):
+    field = make_field(choice_count, other_field)
+    if kind == 'choice':
+        value = ['choice5', None]
+    else:
+        value = [OTHER_CHOICE, field.fields[1].clean(other_value(other_field, groups))]
+    benchmark(field.compress, value)
+
+
+# Forms
+
+def test_form_construction(benchmark, field_count, choice_count, other_field, groups):
+    form_class = make_form_class(field_count, choice_count, other_field)
+    data = make_form_data(field_count, other_field, groups)
+    benchmark(form_class, data)
+
+
+def test_form_is_valid(benchmark, field_count, choice_count, other_field, groups):
+    form_class = make_form_class(field_count, choice_count, other_field)
+    data = make_form_data(field_count, other_field, groups)
+    assert benchmark(lambda: form_class(data).is_valid())
+
+
+def test_form_render(benchmark, field_count, choice_count, other_field, groups):
+    form_class = make_form_class(field_count, choice_count, other_field)
+    data = make_form_data(field_count, other_field, groups)
+    # The first render compiles the choices of every field, once per process.
+    form_class(data).as_p()
+    benchmark(lambda: form_class(data).as_p())
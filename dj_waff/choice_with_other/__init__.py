@@ -1,16 +1,93 @@
 # based on https://github.com/DjangoAdminHackers/select-url-field/blob/master/select_url_field/choice_with_other.py
 #
+import copy
+import sys
+from functools import partial, wraps
+
 from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.utils import flatatt
 from django.utils.encoding import force_text
-from django.utils.html import format_html
+from django.utils.html import conditional_escape, format_html
 from django.utils.safestring import mark_safe
-from .widget_compat import RadioChoiceInput, RadioFieldRenderer, ChoiceFieldRenderer, RadioSelect
+from django.utils.translation import ugettext_lazy as _
+
+from .choices import (
+    IndexedChoiceField, LazyChoices, choices_version, flatten_choice_values, freeze_choices, is_lazy_choice_source,
+    resolve_labels, versioned_index,
+)
+from .fragments import (
+    CHECKED_HTML, FragmentBuilder, ID_MARKER, NAME_MARKER, SELECTED_HTML, SPLIT_MARKER, fragment_cache,
+    split_at_marker,
+)
+from .widget_compat import RadioChoiceInput, RadioFieldRenderer, RadioSelect
 
 OTHER_CHOICE = '__other__'
 OTHER_CHOICE_DISPLAY = ''  # 'Other:'
+OTHER_FORM_FIELD_PLACEHOLDER = '{other_form_field}'
+MISSING_OTHER_VALUE = object()
+
+# The instrumentation module is imported by the code registering sinks, not
+# by the package. Until then, instrumented methods only look it up here.
+INSTRUMENTATION_MODULE = __name__ + '.instrumentation'
+
+
+def _instrumentation():
+    """Returns the instrumentation module while sinks are registered, else None."""
+    instrumentation = sys.modules.get(INSTRUMENTATION_MODULE)
+    if instrumentation is None or not instrumentation.sinks:
+        return None
+    return instrumentation
+
+
+def instrumented(kind, name=None):
+    """
+    Decorator of the methods measured by ``instrumentation.measure()`` while
+    a sink is registered. ``name`` returns the field name from the instance
+    and the arguments.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            instrumentation = _instrumentation()
+            if instrumentation is None:
+                return method(self, *args, **kwargs)
+            return instrumentation.measure(kind, name, method, self, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def argument(name, position=0):
+    """
+    Returns a name getter for ``instrumented()`` that reads the argument
+    ``name``, passed at ``position`` or as a keyword, as BoundField does
+    since Django 1.11.
+    """
+    def get(obj, args, kwargs):
+        return args[position] if len(args) > position else kwargs.get(name)
+    return get
+
+
+def attribute(path):
+    """Returns a name getter for ``instrumented()`` that reads ``path`` on the instance."""
+    names = path.split('.')
+
+    def get(obj, args, kwargs):
+        for name in names:
+            obj = getattr(obj, name, None)
+        return obj
+    return get
+
+
+def _note_cache(status):
+    instrumentation = _instrumentation()
+    if instrumentation is not None:
+        instrumentation.note_cache(status)
 
 
 class RadioChoiceInputWithOther(RadioChoiceInput):
+    __slots__ = ()
+
     def render(self, name=None, value=None, attrs=None, choices=()):
         if self.id_for_label:
             label_for = format_html(' for="{}"', self.id_for_label)
@@ -26,59 +103,376 @@ class RadioChoiceInputWithOther(RadioChoiceInput):
         )
 
 
+def build_provided_index(choices):
+    """Returns a set of the choice values, without the "other" choice."""
+    return frozenset(v for v in flatten_choice_values(choices) if v != OTHER_CHOICE)
+
+
+class _NotCompilable(Exception):
+    pass
+
+
 class ChoiceWithOtherRenderer(RadioFieldRenderer):
     """RadioFieldRenderer that renders its last choice with a placeholder."""
     custom_choice_input_class = RadioChoiceInputWithOther
 
-    def render(self):
+    fragment_cache = fragment_cache
+
+    def __getitem__(self, idx):
+        """Returns the input of one choice, without creating the other inputs."""
+        if isinstance(idx, slice):
+            return list(self)[idx]
+        choices = self.choices if isinstance(self.choices, (list, tuple)) else list(self.choices)
+        idx = range(len(choices))[idx]
+        return self.choice_input_class(self.name, self.value, self.attrs.copy(), choices[idx], idx)
+
+    @instrumented('renderer.render', name=attribute('name'))
+    def render(self, other_html=OTHER_FORM_FIELD_PLACEHOLDER):
+        """
+        Outputs a <ul> for this set of choice fields, with ``other_html``
+        written in the "other" slot.
+        The markup is compiled once per attrs and choices and kept in
+        ``fragment_cache``; only the name, the ids, the checked radio and the
+        "other" slot are filled in on each call.
+        """
+        compiled = self.get_compiled()
+        if compiled is None:
+            return self.render_uncached(other_html)
+        return compiled.render(force_text(self.value), other_html, **self._compiled_kwargs())
+
+    def _compiled_kwargs(self):
+        return {
+            'name': conditional_escape(self.name),
+            'id_': conditional_escape(self.attrs.get('id') or ''),
+        }
+
+    def _compiled_attrs(self):
+        # The markup doesn't depend on the id, so it is compiled with a marker
+        # in its place and shared by every field (or formset row) that only
+        # differs in name and id.
+        if self.attrs.get('id'):
+            return dict(self.attrs, id=ID_MARKER)
+        return self.attrs
+
+    def get_compiled(self):
+        if self.fragment_cache is None:
+            return self.compile()
+        version = choices_version(self.choices)
+        key = self.fragment_cache.make_key(type(self), self._compiled_attrs(),
+                                           self.choices if version is None else version)
+        if key is None:
+            return self.compile()
+        compiled = self.fragment_cache.get(key)
+        if compiled is None:
+            compiled = self.compile()
+            if compiled is not None:
+                self.fragment_cache.set(key, compiled)
+        return compiled
+
+    def compile(self):
+        """
+        Renders the choices once, leaving slots for the name, the ids, the
+        checked marker and the "other" widget. Returns None if the choice
+        inputs can't be split into static markup and slots.
+        """
+        builder = FragmentBuilder()
+        try:
+            self._compile_list(builder, NAME_MARKER, self._compiled_attrs(), self.choices, top_level=True)
+        except _NotCompilable:
+            return None
+        return builder.build()
+
+    def _compile_list(self, builder, name, attrs, choices, top_level):
+        id_ = attrs.get('id', None)
+        head, tail = split_at_marker(format_html(self.outer_html,
+                                                 id_attr=format_html(' id="{}"', id_) if id_ else '',
+                                                 content=mark_safe(SPLIT_MARKER)))
+        builder.text(head)
+        # As in _iter_list(), each input gets a copy of the attrs. This only
+        # runs once per choices version, renders reuse the compiled markup.
+        if top_level:
+            choice_attrs = dict(attrs, **{'data-choice-fields': name})
+        for i, choice in enumerate(choices):
+            if i:
+                builder.text('\n')
+            choice_value, choice_label = choice
+            if isinstance(choice_label, (tuple, list)):
+                attrs_plus = attrs.copy()
+                if id_:
+                    attrs_plus['id'] += '_{}'.format(i)
+                head_li, tail_li = split_at_marker(format_html(self.inner_html, choice_value=choice_value,
+                                                               sub_widgets=mark_safe(SPLIT_MARKER)))
+                builder.text(head_li)
+                self._compile_list(builder, name, attrs_plus, choice_label, top_level=False)
+                builder.text(tail_li)
+            else:
+                head_li, tail_li = split_at_marker(format_html(self.inner_html, choice_value=mark_safe(SPLIT_MARKER),
+                                                               sub_widgets=''))
+                builder.text(head_li)
+                if top_level:
+                    if OTHER_CHOICE == choice[0]:
+                        w = self.custom_choice_input_class(name, self.value, choice_attrs.copy(), choice, i)
+                        self._compile_input(builder, w, has_other_slot=True)
+                    else:
+                        w = self.choice_input_class(name, self.value, choice_attrs.copy(), choice, i)
+                        self._compile_input(builder, w)
+                else:
+                    w = self.choice_input_class(name, self.value, attrs.copy(), choice, i)
+                    self._compile_input(builder, w)
+                builder.text(tail_li)
+        builder.text(tail)
+
+    def _compile_input(self, builder, w, has_other_slot=False):
+        w.value = None
+        unchecked = force_text(w)
+        w.value = w.choice_value
+        before, checked_html, after = force_text(w).partition(CHECKED_HTML)
+        if not checked_html or before + after != unchecked:
+            raise _NotCompilable()
+        builder.text(before)
+        builder.checked_slot(w.choice_value)
+        if has_other_slot:
+            after, placeholder, after_other = after.rpartition(OTHER_FORM_FIELD_PLACEHOLDER)
+            if not placeholder:
+                raise _NotCompilable()
+            builder.text(after)
+            builder.other_slot()
+            builder.text(after_other)
+        else:
+            builder.text(after)
+
+    def iter_render(self, other_html=OTHER_FORM_FIELD_PLACEHOLDER):
+        """
+        Yields the <ul> in chunks of at most one choice each, with
+        ``other_html`` written in the "other" slot. The choices are rendered
+        one by one, including those of groups: the markup of the whole list
+        is never built, compiled or cached.
+        """
+        return self._iter_list(self.attrs, self.choices, other_html, top_level=True)
+
+    def render_uncached(self, other_html=OTHER_FORM_FIELD_PLACEHOLDER):
         """
         Outputs a <ul> for this set of choice fields.
         If an id was given to the field, it is applied to the <ul> (each
         item in the list will get an id of `$id_$i`).
         """
-        id_ = self.attrs.get('id', None)
-        output = []
-        for i, choice in enumerate(self.choices):
+        return mark_safe(''.join(self._iter_list(self.attrs, self.choices, other_html, top_level=True)))
+
+    def _iter_list(self, attrs, choices, other_html, top_level):
+        id_ = attrs.get('id', None)
+        head, tail = split_at_marker(format_html(self.outer_html,
+                                                 id_attr=format_html(' id="{}"', id_) if id_ else '',
+                                                 content=mark_safe(SPLIT_MARKER)))
+        yield head
+        # The inputs (Django's own ChoiceInput on 1.10) add their id suffix
+        # to the attrs they are given, so each one gets a copy of these.
+        choice_attrs = dict(attrs, **{'data-choice-fields': self.name}) if top_level else attrs
+        for i, choice in enumerate(choices):
+            if i:
+                yield '\n'
             choice_value, choice_label = choice
             if isinstance(choice_label, (tuple, list)):
-                attrs_plus = self.attrs.copy()
+                attrs_plus = attrs.copy()
                 if id_:
                     attrs_plus['id'] += '_{}'.format(i)
-                sub_ul_renderer = ChoiceFieldRenderer(name=self.name,
-                                                      value=self.value,
-                                                      attrs=attrs_plus,
-                                                      choices=choice_label)
-                sub_ul_renderer.choice_input_class = self.choice_input_class
-                output.append(format_html(self.inner_html, choice_value=choice_value,
-                                          sub_widgets=sub_ul_renderer.render()))
+                head_li, tail_li = split_at_marker(format_html(self.inner_html, choice_value=choice_value,
+                                                               sub_widgets=mark_safe(SPLIT_MARKER)))
+                yield head_li
+                for chunk in self._iter_list(attrs_plus, choice_label, other_html, top_level=False):
+                    yield chunk
+                yield tail_li
+            elif top_level and OTHER_CHOICE == choice[0]:
+                w = self.custom_choice_input_class(self.name, self.value, choice_attrs.copy(), choice, i)
+                formated_text = format_html(self.inner_html, choice_value=w, sub_widgets='')
+                before, placeholder, after = formated_text.rpartition(OTHER_FORM_FIELD_PLACEHOLDER)
+                if placeholder:
+                    formated_text = before + other_html + after
+                yield formated_text
             else:
-                attrs = self.attrs.copy()
-                attrs.update(
-                    {
-                        'data-choice-fields': self.name
-                    }
-                )
-                if OTHER_CHOICE == choice[0]:
-                    w = self.custom_choice_input_class(self.name, self.value,
-                                                       attrs, choice, i)
-                    formated_text = format_html(self.inner_html,
-                                                choice_value=w, sub_widgets='')
-                else:
-                    w = self.choice_input_class(self.name, self.value,
-                                                attrs, choice, i)
-                    formated_text = format_html(self.inner_html,
-                                                choice_value=force_text(w), sub_widgets='')
-                output.append(formated_text)
-        return format_html(self.outer_html,
-                           id_attr=format_html(' id="{}"', id_) if id_ else '',
-                           content=mark_safe('\n'.join(output)))
+                w = self.choice_input_class(self.name, self.value, choice_attrs.copy(), choice, i)
+                yield format_html(self.inner_html, choice_value=force_text(w), sub_widgets='')
+        yield tail
+
+
+class CompiledSelect(forms.Select):
+    """
+    Select whose markup is compiled once per choices and attrs and kept in
+    ``fragment_cache``; only the name, the id and the selected option are
+    filled in on each render. Best used with LazyChoices, whose version is a
+    cheap cache key. The options are written like the ``render_option()`` of
+    Django 1.10 and earlier, on every version.
+    """
+    fragment_cache = fragment_cache
+
+    def render(self, name, value, attrs=None, renderer=None):
+        if value is None:
+            value = ''
+        final_attrs = dict(self.attrs, name=name)
+        if attrs:
+            final_attrs.update(attrs)
+        id_ = final_attrs.get('id')
+        # Attrs holding the name or the id are compiled with markers in their
+        # place, so that every field with the same choices shares the markup.
+        compiled_attrs = dict((key, NAME_MARKER if attr == name else ID_MARKER if id_ and attr == id_ else attr)
+                              for key, attr in final_attrs.items())
+        return self.get_compiled(compiled_attrs).render(force_text(value), name=conditional_escape(name),
+                                                        id_=conditional_escape(id_ or ''))
+
+    def get_compiled(self, attrs):
+        version = choices_version(self.choices)
+        key = self.fragment_cache.make_key(type(self), attrs, self.choices if version is None else version)
+        compiled = self.fragment_cache.get(key) if key is not None else None
+        if compiled is None:
+            compiled = self.compile(attrs)
+            if key is not None:
+                self.fragment_cache.set(key, compiled)
+        return compiled
+
+    def compile(self, attrs):
+        builder = FragmentBuilder()
+        builder.text(format_html('<select{}>\n', flatatt(attrs)))
+        for i, (option_value, option_label) in enumerate(self.choices):
+            if isinstance(option_label, (list, tuple)):
+                builder.text(format_html('<optgroup label="{}">', force_text(option_value)))
+                for option in option_label:
+                    builder.text('\n')
+                    self._compile_option(builder, *option)
+                builder.text('\n</optgroup>\n')
+            else:
+                self._compile_option(builder, option_value, option_label)
+                builder.text('\n')
+        builder.text('</select>')
+        return builder.build(checked_html=SELECTED_HTML, first_only=True)
+
+    def _compile_option(self, builder, option_value, option_label):
+        text_value = force_text('' if option_value is None else option_value)
+        builder.text(format_html('<option value="{}"', text_value))
+        builder.checked_slot(text_value)
+        builder.text(format_html('>{}</option>', force_text(self.get_option_label(option_value, option_label))))
+
+    def get_option_label(self, option_value, option_label):
+        """Returns the label shown for an option."""
+        return option_label
+
+
+class ChoiceWithOtherSelect(CompiledSelect):
+    """
+    CompiledSelect of the choices of a ChoiceWithOtherWidget in its select
+    layout. The "other" choice, which has no label in the radio list, is
+    labelled ``other_label``.
+    """
+    other_label = _('Other')
+
+    def get_option_label(self, option_value, option_label):
+        if option_value == OTHER_CHOICE and not option_label:
+            return self.other_label
+        return option_label
+
+
+class DeferredSelect(forms.Select):
+    """
+    Select that renders only its empty and selected options. The other
+    options are fetched from ``url`` (a URL or URL name of an
+    OtherChoicesView) by choice_with_other.js when they are needed.
+    """
+
+    def __init__(self, url, attrs=None):
+        super(DeferredSelect, self).__init__(attrs)
+        self.url = url
+
+    def get_url(self):
+        from django.shortcuts import resolve_url
+
+        return resolve_url(self.url)
+
+    def get_rendered_choices(self, value):
+        """
+        Returns the empty choice and the choice of ``value``, querying only
+        that row when the choices come from a ModelChoiceField.
+        """
+        field = getattr(self.choices, 'field', None)
+        if field is None:
+            text_value = force_text(value)
+            return [choice for choice in self.choices if choice[0] == '' or force_text(choice[0]) == text_value]
+        rendered_choices = []
+        if field.empty_label is not None:
+            rendered_choices.append(('', field.empty_label))
+        if value not in field.empty_values:
+            key = field.to_field_name or 'pk'
+            try:
+                objects = list(self.choices.queryset.filter(**{key: field.prepare_value(value)})[:1])
+            except (ValueError, TypeError, ValidationError):
+                objects = []
+            rendered_choices.extend(self.choices.choice(obj) for obj in objects)
+        return rendered_choices
+
+    def render(self, name, value, attrs=None):
+        if value is None:
+            value = ''
+        final_attrs = dict(self.attrs, name=name, **{'data-deferred-choices-url': self.get_url()})
+        if attrs:
+            final_attrs.update(attrs)
+        text_value = force_text(value)
+        output = [format_html('<select{}>', flatatt(final_attrs))]
+        for option_value, option_label in self.get_rendered_choices(value):
+            option_value = force_text(option_value)
+            output.append(format_html('<option value="{}"{}>{}</option>',
+                                      option_value,
+                                      mark_safe(' selected="selected"') if option_value == text_value else '',
+                                      force_text(option_label)))
+        output.append('</select>')
+        return mark_safe('\n'.join(output))
 
 
 class ChoiceWithOtherWidget(forms.MultiWidget):
     """MultiWidget for use with ChoiceWithOtherField"""
+    outer_html = '<div class="choice_with_other_wrapper" style="display: table-row;">{choices_fields}</div>'
+
+    # Set template_name (e.g. to 'dj_waff/choice_with_other/widget.html') to
+    # render the widget with the template engine instead of the compiled
+    # markup.
+    template_name = None
+    list_template_name = 'dj_waff/choice_with_other/radio_list.html'
+    option_template_name = 'dj_waff/choice_with_other/radio_option.html'
+    other_template_name = 'dj_waff/choice_with_other/other_slot.html'
+
+    # A RenderCache to keep the rendered widget in, see render().
+    render_cache = None
 
-    def __init__(self, choice_field_instance, other_form_field, attrs=None):
+    # The name the widget's data was last read under while instrumentation
+    # was enabled, see value_from_datadict().
+    instrumented_name = None
+
+    # Set select_layout to render the choices as a <select> followed by the
+    # "other" widget instead of a radio list, see render_select().
+    select_layout = False
+    select_class = ChoiceWithOtherSelect
+
+    # Set virtualized to send the choices as JSON and let
+    # choice_with_other.js render only the visible ones, see render_virtual().
+    virtualized = False
+    virtual_rows = 10
+    virtual_row_height = 24
+    virtual_html = (
+        '<div class="choice_with_other_virtual"{id_attr} data-row-height="{row_height}">'
+        '<input name="{name}" type="hidden" value="{value}" />'
+        '<input type="search" aria-label="{filter_label}" data-virtual-filter />'
+        '<div data-virtual-viewport{scroll_top_attr} style="height: {height}px; overflow-y: auto;">'
+        '<ul style="padding-top: {padding_top}px; padding-bottom: {padding_bottom}px;">{rows}</ul></div>'
+        '<label><input type="radio" value="{other_value}" data-virtual-other{other_checked} /> {other_label}'
+        '<div class="other-field">{other_html}</div></label>'
+        '<script type="application/json" data-virtual-choices>{choices_json}</script>'
+        '</div>'
+    )
+
+    def __init__(self, choice_field_instance, other_form_field, attrs=None, other_choices_url=None):
         self.other_form_field = other_form_field
+        if other_choices_url:
+            # Render only the selected choice of the other field and let the
+            # browser fetch the rest from other_choices_url.
+            deferred_widget = DeferredSelect(other_choices_url, attrs=other_form_field.widget.attrs)
+            deferred_widget.choices = other_form_field.widget.choices
+            self.other_form_field.widget = deferred_widget
         self.other_form_field.widget.is_required = False
         self.other_form_field.widget.attrs.update(
             {
@@ -92,25 +486,307 @@ class ChoiceWithOtherWidget(forms.MultiWidget):
         self.choices = choice_field_instance.choices
         super(ChoiceWithOtherWidget, self).__init__(widgets, attrs=attrs)
 
+    def __deepcopy__(self, memo):
+        """
+        Copies the attrs and the subwidgets, and copies the list of choices
+        without copying the choices themselves. The index of the choices is
+        shared until the copy is changed. The subwidgets and the choices are
+        copied through ``memo``, so the copied subfields of a
+        ChoiceWithOtherField use the same copies instead of copies of their
+        own.
+        """
+        obj = super(forms.MultiWidget, self).__deepcopy__(memo)
+        obj._choices = copy.deepcopy(self._choices, memo)
+        obj.widgets = [copy.deepcopy(widget, memo) for widget in self.widgets]
+        return obj
+
+    @property
+    def choices(self):
+        return self._choices
+
+    @choices.setter
+    def choices(self, value):
+        self._choices = value if isinstance(value, LazyChoices) else freeze_choices(value)
+        self._choice_index = None
+
+    @property
+    def choice_index(self):
+        """
+        Values of the provided choices, to look up the value in decompress()
+        without scanning the choices.
+        """
+        if isinstance(self._choices, LazyChoices):
+            return self._choices.derived(build_provided_index, build_provided_index)
+        return versioned_index(self, self._choices, build_provided_index)
+
+    @instrumented('widget.decompress')
     def decompress(self, value):
         if value:
-            # return value
-            choices = [c[0] for c in self.choices]
-            provided_choices, other_choice = choices[:-1], choices[-1:]
-            if value in provided_choices:
+            try:
+                is_provided_choice = value in self.choice_index
+            except TypeError:
+                is_provided_choice = False
+            if is_provided_choice:
                 return [value, '']
             else:
                 return [OTHER_CHOICE, value]
         return ['', '']
 
+    def get_renderer_and_other_html(self, name, value, attrs=None):
+        """
+        Returns the renderer of the choice list and the rendered "other"
+        widget.
+        """
+        if self.is_localized:
+            for widget in self.widgets:
+                widget.is_localized = self.is_localized
+        if not isinstance(value, list):
+            value = self.decompress(value)
+        choice_value, other_value = (list(value) + [None, None])[:2]
+        # Django's build_attrs() takes the base attrs since 1.11.
+        final_attrs = dict(self.attrs)
+        if attrs:
+            final_attrs.update(attrs)
+        id_ = final_attrs.get('id')
+        choice_widget, other_widget = self.widgets
+        other_html = other_widget.render(name + '_1', other_value,
+                                         dict(final_attrs, id='%s_1' % id_) if id_ else final_attrs)
+        renderer = choice_widget.get_renderer(name + '_0', choice_value,
+                                              dict(final_attrs, id='%s_0' % id_) if id_ else final_attrs)
+        return renderer, other_html
+
+    def iter_render(self, name, value, attrs=None, renderer=None):
+        """
+        Yields the rendered widget in chunks instead of building the whole
+        string, holding at most one choice's markup at a time, plus the
+        markup of the "other" widget, which is rendered first. The result can
+        be passed to a ``StreamingHttpResponse``.
+
+        Only the radio list is streamed, without compiling or caching it. The virtualized, select and template
+        layouts, and widgets with a ``render_cache``, are rendered in one
+        chunk by ``render()``.
+        """
+        if self.virtualized or self.select_layout or self.template_name or self.render_cache is not None:
+            yield self.render(name, value, attrs, renderer)
+            return
+        renderer, other_html = self.get_renderer_and_other_html(name, value, attrs)
+        head, tail = self.outer_html.split('{choices_fields}')
+        yield head
+        for chunk in renderer.iter_render(other_html):
+            yield chunk
+        yield tail
+
+    @instrumented('widget.render', name=argument('name'))
+    def render(self, name, value, attrs=None, renderer=None):
+        """
+        Renders both widgets in a single pass: the "other" widget is written
+        straight into the slot of the choice list. If ``template_name`` is
+        set, renders it with ``renderer`` (any object with a
+        ``render(template_name, context)`` method, like Django's form
+        renderers) or with the configured template engines.
+
+        If ``render_cache`` is set, the result is kept there and reused by
+        every render with the same name, attrs, choices, value and language,
+        unless the "other" widget can't be cached.
+        """
+        key = None
+        if self.render_cache is not None:
+            key = self.get_render_cache_key(name, value, attrs, renderer)
+            if key is not None:
+                html = self.render_cache.get(key)
+                if html is not None:
+                    _note_cache('hit')
+                    return mark_safe(html)
+                _note_cache('miss')
+            else:
+                _note_cache('bypass')
+        html = self.render_uncached(name, value, attrs, renderer)
+        if key is not None:
+            self.render_cache.set(key, html)
+        return html
+
+    def value_from_datadict(self, data, files, name):
+        if _instrumentation() is not None:
+            # ChoiceWithOtherField.clean() is measured under this name.
+            self.instrumented_name = name
+        return super(ChoiceWithOtherWidget, self).value_from_datadict(data, files, name)
+
+    def render_uncached(self, name, value, attrs=None, renderer=None):
+        if self.virtualized:
+            return self.render_virtual(name, value, attrs)
+        if self.select_layout:
+            return self.render_select(name, value, attrs)
+        if self.template_name:
+            context = self.get_context(name, value, attrs)
+            if renderer is None:
+                from django.template.loader import render_to_string
+
+                return mark_safe(render_to_string(self.template_name, context))
+            return mark_safe(renderer.render(self.template_name, context))
+        renderer, other_html = self.get_renderer_and_other_html(name, value, attrs)
+        head, tail = self.outer_html.split('{choices_fields}')
+        return mark_safe(head + renderer.render(other_html) + tail)
+
+    def render_select(self, name, value, attrs=None):
+        """
+        Renders the choices as a ``<name>_0`` select, whose options are
+        compiled once per choices version and language, followed by the
+        "other" widget. The submitted data is the same as for the radio list.
+        """
+        choice_renderer, other_html = self.get_renderer_and_other_html(name, value, attrs)
+        select = self.select_class()
+        select.choices = choice_renderer.choices
+        select_attrs = dict(choice_renderer.attrs, **{'data-choice-fields': choice_renderer.name})
+        head, tail = self.outer_html.split('{choices_fields}')
+        return mark_safe(head + select.render(choice_renderer.name, choice_renderer.value, select_attrs) +
+                         format_html('<div class="other-field">{}</div>', other_html) + tail)
+
+    def render_virtual(self, name, value, attrs=None):
+        """
+        Renders the choices as one JSON payload plus ``virtual_rows`` radio
+        inputs: the first ones, or the ones starting at the selected choice
+        when it's further down, with the list scrolled to it by
+        choice_with_other.js. The script renders the rows scrolled into view
+        and filters them. The selected value is kept in a hidden
+        ``<name>_0`` input, so the submitted data is the same as for the
+        radio list.
+        """
+        choice_renderer, other_html = self.get_renderer_and_other_html(name, value, attrs)
+        value = force_text(choice_renderer.value if choice_renderer.value is not None else '')
+        id_ = choice_renderer.attrs.get('id')
+        rows = get_virtual_rows(choice_renderer.choices)
+        start = get_virtual_row_positions(choice_renderer.choices).get(value, 0)
+        if start < self.virtual_rows:
+            start = 0
+        else:
+            start = min(start, len(rows) - self.virtual_rows)
+        shown_rows = rows[start:start + self.virtual_rows]
+        padding_top = start * self.virtual_row_height
+        head, tail = self.outer_html.split('{choices_fields}')
+        return mark_safe(head + format_html(
+            self.virtual_html,
+            id_attr=format_html(' id="{}"', id_) if id_ else '',
+            row_height=self.virtual_row_height,
+            name=choice_renderer.name,
+            value=value,
+            filter_label=_('Filter choices'),
+            height=self.virtual_rows * self.virtual_row_height,
+            scroll_top_attr=format_html(' data-scroll-top="{}"', padding_top) if padding_top else '',
+            padding_top=padding_top,
+            padding_bottom=(len(rows) - start - len(shown_rows)) * self.virtual_row_height,
+            rows=mark_safe(''.join(_virtual_row_html(row, value) for row in shown_rows)),
+            other_value=OTHER_CHOICE,
+            other_checked=mark_safe(CHECKED_HTML) if value == OTHER_CHOICE else '',
+            other_label=OTHER_CHOICE_DISPLAY,
+            other_html=other_html,
+            choices_json=get_virtual_choices_json(choice_renderer.choices),
+        ) + tail)
+
+    def get_render_cache_key(self, name, value, attrs=None, renderer=None):
+        """
+        Returns the key of the rendered widget in ``render_cache``, or None if
+        the "other" widget can't be cached.
+        """
+        from .caching import cached_choices_digest
+
+        choice_widget, other_widget = self.widgets
+        other_key = self.get_other_widget_cache_key(other_widget)
+        if other_key is None:
+            self.render_cache.bypass()
+            return None
+        return self.render_cache.make_key(
+            _class_path(type(self)), self.template_name, _class_path(renderer and type(renderer)), self.is_localized,
+            self.virtualized and (self.virtual_rows, self.virtual_row_height),
+            self.select_layout and _class_path(self.select_class),
+            _class_path(getattr(choice_widget, 'renderer', None)), choice_widget.attrs,
+            cached_choices_digest(self.choices),
+            other_key, self.attrs, name, attrs, value,
+        )
+
+    def get_other_widget_cache_key(self, widget):
+        """
+        Returns the part of the cache key for the "other" widget, or None if
+        its markup can depend on more than its attrs and value: a widget with
+        ``render_cacheable = False``, a DeferredSelect or a Select whose
+        choices come from a queryset or a callable. Widgets other than
+        inputs, textareas and selects, and selects of querysets that rarely
+        change, must set ``render_cacheable = True`` to be cached.
+        """
+        declared_cacheable = getattr(widget, 'render_cacheable', None)
+        if declared_cacheable is False:
+            return None
+        if declared_cacheable is None and (not isinstance(widget, (forms.widgets.Input, forms.Textarea, forms.Select))
+                                           or isinstance(widget, DeferredSelect)):
+            return None
+        choices = getattr(widget, 'choices', None)
+        if isinstance(choices, (list, tuple, LazyChoices)):
+            from .caching import cached_choices_digest
+
+            choices_key = cached_choices_digest(choices)
+        elif choices is None or declared_cacheable:
+            choices_key = None
+        else:
+            return None
+        return _class_path(type(widget)), widget.attrs, widget.is_localized, choices_key
+
+    def get_context(self, name, value, attrs=None):
+        """
+        Returns the context of ``template_name``: the choice list, with the
+        final attrs of every radio input, and the rendered "other" widget.
+        """
+        choice_renderer, other_html = self.get_renderer_and_other_html(name, value, attrs)
+        return {
+            'widget': {
+                'name': name,
+                'value': value,
+                'template_name': self.template_name,
+                'list_template_name': self.list_template_name,
+                'option_template_name': self.option_template_name,
+                'other_template_name': self.other_template_name,
+                'choices': self._get_list_context(choice_renderer.name, force_text(choice_renderer.value),
+                                                  choice_renderer.attrs, resolve_labels(choice_renderer.choices),
+                                                  top_level=True),
+                'other': other_html,
+            }
+        }
+
+    def _get_list_context(self, name, value, attrs, choices, top_level):
+        id_ = attrs.get('id')
+        items = []
+        for i, (choice_value, choice_label) in enumerate(choices):
+            if isinstance(choice_label, (list, tuple)):
+                group_attrs = dict(attrs, id='{}_{}'.format(id_, i)) if id_ else attrs
+                items.append({
+                    'label': force_text(choice_value),
+                    'group': self._get_list_context(name, value, group_attrs, choice_label, top_level=False),
+                })
+                continue
+            input_attrs = dict(attrs, type='radio', name=name, value=force_text(choice_value))
+            if top_level:
+                input_attrs['data-choice-fields'] = name
+            if id_:
+                input_attrs['id'] = '{}_{}'.format(id_, i)
+            if input_attrs['value'] == value:
+                input_attrs['checked'] = 'checked'
+            items.append({
+                'label': choice_label,
+                'id_for_label': input_attrs.get('id', ''),
+                'attrs': _attr_items(input_attrs),
+                'is_other': top_level and choice_value == OTHER_CHOICE,
+            })
+        return {'id': id_, 'items': items}
+
     def format_output(self, rendered_widgets):
 
         """Format the output by substituting the "other" choice into the first widget"""
 
-        ret = u'<div class="choice_with_other_wrapper" style="display: table-row;">{choices_fields}</div>'.format(
-            choices_fields=rendered_widgets[0])
-        ret = ret.format(other_form_field=rendered_widgets[1])
-        return ret
+        before, placeholder, after = force_text(rendered_widgets[0]).rpartition(OTHER_FORM_FIELD_PLACEHOLDER)
+        if placeholder:
+            choices_fields = before + rendered_widgets[1] + after
+        else:
+            choices_fields = after
+        head, tail = self.outer_html.split('{choices_fields}')
+        return head + choices_fields + tail
 
     class Media:
         js = (
@@ -118,26 +794,205 @@ class ChoiceWithOtherWidget(forms.MultiWidget):
         )
 
 
+def get_virtual_rows(choices):
+    """
+    Returns the provided choices as rows of a virtualized list: ``[value,
+    label]`` for a choice and ``[label]`` for the heading of a group.
+    Computed once per choices version and language.
+    """
+    version = choices_version(choices)
+    if version is None:
+        return _build_virtual_rows(choices)
+    key = fragment_cache.make_key(get_virtual_rows, version)
+    rows = fragment_cache.get(key)
+    if rows is None:
+        rows = _build_virtual_rows(choices)
+        fragment_cache.set(key, rows)
+    return rows
+
+
+def get_virtual_row_positions(choices):
+    """
+    Returns the position of each choice value in get_virtual_rows(), computed
+    once per choices version and language.
+    """
+    version = choices_version(choices)
+    key = None if version is None else fragment_cache.make_key(get_virtual_row_positions, version)
+    positions = fragment_cache.get(key) if key is not None else None
+    if positions is None:
+        positions = {row[0]: index for index, row in enumerate(get_virtual_rows(choices)) if len(row) == 2}
+        if key is not None:
+            fragment_cache.set(key, positions)
+    return positions
+
+
+def _build_virtual_rows(choices):
+    rows = []
+    for choice_value, choice_label in choices:
+        if isinstance(choice_label, (list, tuple)):
+            rows.append([force_text(choice_value)])
+            rows.extend(row for row in _build_virtual_rows(choice_label) if len(row) == 2)
+        elif choice_value != OTHER_CHOICE:
+            rows.append([force_text(choice_value), force_text(choice_label)])
+    return rows
+
+
+_json_script_escapes = {ord('<'): '\\u003C', ord('>'): '\\u003E', ord('&'): '\\u0026'}
+
+
+def get_virtual_choices_json(choices):
+    """
+    Returns the rows of get_virtual_rows() as JSON that is safe to put in a
+    ``<script>`` element.
+    """
+    version = choices_version(choices)
+    key = None if version is None else fragment_cache.make_key(get_virtual_choices_json, version)
+    payload = fragment_cache.get(key) if key is not None else None
+    if payload is None:
+        import json
+
+        payload = json.dumps(get_virtual_rows(choices), separators=(',', ':'))
+        payload = mark_safe(payload.translate(_json_script_escapes))
+        if key is not None:
+            fragment_cache.set(key, payload)
+    return payload
+
+
+def _virtual_row_html(row, value):
+    if len(row) == 1:
+        return format_html('<li class="optgroup">{}</li>', row[0])
+    return format_html('<li><label><input type="radio" value="{}" data-virtual-choice{} /> {}</label></li>',
+                       row[0], mark_safe(CHECKED_HTML) if row[0] == value else '', row[1])
+
+
+def _class_path(cls):
+    return None if cls is None else '{}.{}'.format(cls.__module__, cls.__name__)
+
+
+def _attr_items(attrs):
+    """
+    Returns the attrs as (name, value) pairs in flatatt() order, with None as
+    the value of boolean attributes.
+    """
+    items = sorted((k, v) for k, v in attrs.items() if not isinstance(v, bool) and v is not None)
+    items.extend(sorted((k, None) for k, v in attrs.items() if v is True))
+    return items
+
+
+def _first_provided_choice(choices):
+    value = next(iter(choices))[0]
+    return None if value == OTHER_CHOICE else value
+
+
 class ChoiceWithOtherField(forms.MultiValueField):
+    # Maps submitted "other" values to the objects found for them (or to
+    # MISSING_OTHER_VALUE) when a formset has looked them up in bulk.
+    prefetched_other_values = None
+
     def __init__(self, other_form_field, has_empty_choice=False, first_is_preselected=False, *args, **kwargs):
-        choices = list(kwargs.pop('choices'))
+        self.has_empty_choice = has_empty_choice
+        self.choices_ttl = kwargs.pop('choices_ttl', None)
+        choices = self._build_choices(kwargs.pop('choices'))
         initial = kwargs.pop('initial', None)
-        if has_empty_choice:
-            choices.insert(0, ('', '---------'))
-        choices.append((OTHER_CHOICE, OTHER_CHOICE_DISPLAY))
-        if not choices[0][0] == OTHER_CHOICE and not initial and first_is_preselected:
+        if isinstance(choices, LazyChoices):
+            if not initial and first_is_preselected:
+                initial = partial(_first_provided_choice, choices)
+        elif not choices[0][0] == OTHER_CHOICE and not initial and first_is_preselected:
             initial = choices[0][0]
-        choice_field = forms.ChoiceField(choices=choices,
-                                         widget=RadioSelect(choices=choices, renderer=ChoiceWithOtherRenderer)
-                                         )
+        choice_field = IndexedChoiceField(choices=choices,
+                                          widget=RadioSelect(renderer=ChoiceWithOtherRenderer)
+                                          )
         fields = [
             choice_field,
             other_form_field
         ]
-        widget = ChoiceWithOtherWidget(choice_field_instance=choice_field, other_form_field=other_form_field)
+        widget = ChoiceWithOtherWidget(choice_field_instance=choice_field, other_form_field=other_form_field,
+                                       other_choices_url=kwargs.pop('other_choices_url', None))
+        template_name = kwargs.pop('template_name', None)
+        if template_name:
+            widget.template_name = template_name
+        render_cache = kwargs.pop('render_cache', None)
+        if render_cache is not None:
+            widget.render_cache = render_cache
+        if kwargs.pop('virtualized', False):
+            widget.virtualized = True
+        if kwargs.pop('select_layout', False):
+            widget.select_layout = True
         self._was_required = kwargs.pop('required', True)
         kwargs['required'] = False
         super(ChoiceWithOtherField, self).__init__(widget=widget, fields=fields, initial=initial, *args, **kwargs)
+        # Field.__init__() copies the widget since Django 1.11: the subfields
+        # are given the copied subwidgets, which render their choices.
+        for field, subwidget in zip(self.fields, self.widget.widgets):
+            field.widget = subwidget
+
+    def _build_choices(self, choices):
+        """
+        Returns the choices with the empty and "other" choices added. A
+        callable, a queryset or a LazyChoices is wrapped in a LazyChoices that
+        evaluates it on first use and keeps the result for ``choices_ttl``
+        seconds.
+        """
+        if is_lazy_choice_source(choices):
+            return LazyChoices(choices, ttl=self.choices_ttl, prepare=self._with_extra_choices)
+        return self._with_extra_choices(choices)
+
+    def _with_extra_choices(self, choices):
+        choices = list(choices)
+        if self.has_empty_choice:
+            choices.insert(0, ('', '---------'))
+        choices.append((OTHER_CHOICE, OTHER_CHOICE_DISPLAY))
+        return choices
+
+    @property
+    def choices(self):
+        return self.fields[0].choices
+
+    @choices.setter
+    def choices(self, value):
+        """Replaces the provided choices, keeping the empty and "other" choices."""
+        choices = self._build_choices(value)
+        self.fields[0].choices = choices
+        self.widget.choices = self.fields[0].choices
+
+    @instrumented('field.clean', name=attribute('widget.instrumented_name'))
+    def clean(self, value):
+        if (self.prefetched_other_values is None or getattr(self, 'disabled', False) or
+                not isinstance(value, (list, tuple)) or len(value) != 2 or value[0] != OTHER_CHOICE or
+                value[1] in self.empty_values):
+            return super(ChoiceWithOtherField, self).clean(value)
+        # Same as MultiValueField.clean() for an "other" choice and a
+        # non-empty other value, with the other value cleaned by
+        # clean_other_value().
+        clean_data = []
+        errors = []
+        for field, clean, field_value in ((self.fields[0], self.fields[0].clean, value[0]),
+                                          (self.fields[1], self.clean_other_value, value[1])):
+            try:
+                clean_data.append(clean(field_value))
+            except ValidationError as e:
+                errors.extend(m for m in e.error_list if m not in errors)
+        if errors:
+            raise ValidationError(errors)
+        out = self.compress(clean_data)
+        self.validate(out)
+        self.run_validators(out)
+        return out
+
+    def clean_other_value(self, value):
+        """
+        Cleans the value of the "other" ModelChoiceField, taking its object
+        from ``prefetched_other_values`` when it was prefetched.
+        """
+        other_field = self.fields[1]
+        obj = self.prefetched_other_values.get(force_text(value))
+        if obj is None:
+            return other_field.clean(value)
+        if obj is MISSING_OTHER_VALUE:
+            raise ValidationError(other_field.error_messages['invalid_choice'], code='invalid_choice')
+        other_field.validate(obj)
+        other_field.run_validators(obj)
+        return obj
 
     def compress(self, value):
         if self._was_required and (not value or value[0] in (None, '')):
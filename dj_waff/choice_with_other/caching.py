@@ -0,0 +1,147 @@
+"""
+Cache of rendered widgets, stored in a Django cache backend.
+"""
+from __future__ import unicode_literals
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.utils.encoding import force_bytes, force_text
+from django.utils.translation import get_language
+
+from .choices import LazyChoices, choices_version
+from .fragments import FragmentCache
+
+# Digests per choices version (or content, for plain lists) and language.
+digest_cache = FragmentCache()
+
+
+def choices_digest(choices):
+    """
+    Returns a digest of the values and labels of ``choices``, with lazy
+    labels in the active language. Unlike a LazyChoices version, it is the
+    same in every process.
+    """
+    digest = hashlib.sha1()
+    for choice_value, choice_label in choices:
+        digest.update(force_bytes(choice_value))
+        digest.update(b'\x00')
+        if isinstance(choice_label, (list, tuple)):
+            digest.update(force_bytes(choices_digest(choice_label)))
+            digest.update(b'\x01')
+        else:
+            digest.update(force_bytes(choice_label))
+            digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+def cached_choices_digest(choices):
+    """
+    Returns the digest of ``choices`` in the active language, computed once
+    per evaluation of a LazyChoices and kept in ``digest_cache`` per version
+    of FrozenChoices, or per content of other choices.
+    """
+    if isinstance(choices, LazyChoices):
+        return choices.derived((choices_digest, get_language()), choices_digest)
+    version = choices_version(choices)
+    key = digest_cache.make_key(choices_digest, choices if version is None else version)
+    digest = digest_cache.get(key) if key is not None else None
+    if digest is None:
+        digest = choices_digest(choices)
+        if key is not None:
+            digest_cache.set(key, digest)
+    return digest
+
+
+def _key_part(value):
+    # Text instead of the repr() of lazy strings and other objects, which
+    # may differ between processes.
+    if isinstance(value, dict):
+        return tuple(sorted((force_text(k), _key_part(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    if value is None or isinstance(value, bool):
+        return value
+    return force_text(value)
+
+
+class RenderCache(object):
+    """
+    Keeps rendered widgets in the cache ``alias`` of ``settings.CACHES`` for
+    ``timeout`` seconds (the backend's default timeout if not given).
+
+    At most ``max_entries`` widgets are kept per process: the keys stored or
+    found by this instance are tracked in least recently used order, and the
+    least recently used entry is deleted from the backend when a new one
+    goes over the limit. ``max_entries=None`` leaves eviction to the backend.
+
+    ``hits``, ``misses`` and ``bypasses`` (renders that couldn't be cached)
+    count the lookups of every widget using this instance.
+    """
+
+    def __init__(self, alias=DEFAULT_CACHE_ALIAS, timeout=DEFAULT_TIMEOUT, key_prefix='dj_waff.render',
+                 max_entries=1000):
+        self.alias = alias
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+        self.max_entries = max_entries
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def make_key(self, *parts):
+        """Returns a key made of a digest of ``parts`` and the active language."""
+        parts = _key_part(parts + (get_language(),))
+        return '{}:{}'.format(self.key_prefix, hashlib.sha1(force_bytes(repr(parts))).hexdigest())
+
+    def get(self, key):
+        html = self.cache.get(key)
+        with self._lock:
+            if html is None:
+                self.misses += 1
+                self._keys.pop(key, None)
+            else:
+                self.hits += 1
+                evicted = self._touch(key)
+        if html is not None:
+            self._evict(evicted)
+        return html
+
+    def set(self, key, html):
+        self.cache.set(key, force_text(html), self.timeout)
+        with self._lock:
+            evicted = self._touch(key)
+        self._evict(evicted)
+
+    def _touch(self, key):
+        # Marks ``key`` as the most recently used one and returns the keys
+        # that go over max_entries.
+        if self.max_entries is None:
+            return []
+        self._keys.pop(key, None)
+        self._keys[key] = None
+        evicted = []
+        while len(self._keys) > self.max_entries:
+            evicted.append(self._keys.popitem(last=False)[0])
+        return evicted
+
+    def _evict(self, keys):
+        if keys:
+            self.cache.delete_many(keys)
+
+    def bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.bypasses = 0
@@ -0,0 +1,335 @@
+"""
+Helpers for the choices of ChoiceWithOtherField.
+"""
+from __future__ import unicode_literals
+
+import copy
+import itertools
+import threading
+import time
+
+from django import forms
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_text
+from django.utils.functional import Promise
+from django.utils.html import conditional_escape
+
+from .fragments import FragmentCache
+
+# Versions are unique across all LazyChoices instances, so a version alone
+# identifies one evaluation of one source.
+_versions = itertools.count(1)
+
+# Resolved labels per choices version and language.
+label_cache = FragmentCache()
+
+# Versions of FrozenChoices per content, so that equal choices assigned again
+# (e.g. in every Form.__init__) keep their version and the markup cached for
+# it. The choices are kept with their version.
+frozen_choices_cache = FragmentCache()
+
+
+def flatten_choice_values(choices):
+    """Yields the value of every choice, looking inside (optgroup) groups."""
+    for choice_value, choice_label in choices:
+        if isinstance(choice_label, (list, tuple)):
+            for value in flatten_choice_values(choice_label):
+                yield value
+        else:
+            yield choice_value
+
+
+def build_text_index(choices):
+    """Returns a set of the choice values as text."""
+    return frozenset(force_text(v) for v in flatten_choice_values(choices))
+
+
+class FrozenChoices(list):
+    """
+    List of choices with a version, which identifies it in cache keys
+    instead of its (possibly lazy) labels. Its (optgroup) groups are tuples.
+
+    Copies are new lists of the same choices, with the same version, so
+    copying doesn't copy the labels or the groups. Changing a list in place
+    gives it a new version.
+    """
+
+    def __copy__(self):
+        copied = FrozenChoices(self)
+        copied.version = self.version
+        return copied
+
+    def __deepcopy__(self, memo):
+        return self.__copy__()
+
+    def _changed(self):
+        self.version = next(_versions)
+
+
+def _changing(name):
+    def method(self, *args):
+        result = getattr(list, name)(self, *args)
+        self._changed()
+        return result
+    method.__name__ = str(name)
+    return method
+
+
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__', '__iadd__', '__imul__',
+              'append', 'extend', 'insert', 'pop', 'remove', 'reverse', 'sort', 'clear'):
+    if hasattr(list, _name):
+        setattr(FrozenChoices, _name, _changing(_name))
+
+
+def freeze_choices(choices):
+    """
+    Returns the choices as FrozenChoices, with (optgroup) groups as tuples.
+    Choices with the same content as recently frozen ones get their
+    version.
+    """
+    if isinstance(choices, FrozenChoices):
+        return choices
+    items = tuple(
+        (choice_value, _freeze_group(choice_label) if isinstance(choice_label, (list, tuple)) else choice_label)
+        for choice_value, choice_label in choices
+    )
+    frozen = FrozenChoices(items)
+    key = _content_key(items)
+    if key is not None:
+        interned = frozen_choices_cache.get(key)
+        if interned is not None:
+            frozen.version = interned[0]
+            return frozen
+    frozen.version = next(_versions)
+    if key is not None:
+        frozen_choices_cache.set(key, (frozen.version, items))
+    return frozen
+
+
+def _freeze_group(choices):
+    return tuple(
+        (choice_value, _freeze_group(choice_label) if isinstance(choice_label, (list, tuple)) else choice_label)
+        for choice_value, choice_label in choices
+    )
+
+
+def _content_key(choices):
+    """
+    Returns a hashable key of the values and labels of frozen choices, or
+    None if some of them can't be hashed. Types are part of the key, as 1
+    and True render differently, and lazy labels are compared by identity,
+    as they may only differ in another language. The cache holds the
+    choices, so these identities can't be reused while the key is there.
+    """
+    key = []
+    for choice_value, choice_label in choices:
+        if isinstance(choice_label, tuple):
+            label_key = _content_key(choice_label)
+            if label_key is None:
+                return None
+        elif isinstance(choice_label, Promise):
+            label_key = (Promise, id(choice_label))
+        else:
+            label_key = (type(choice_label), choice_label)
+        key.append(((type(choice_value), choice_value), label_key))
+    key = tuple(key)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def versioned_index(obj, choices, build):
+    """
+    Returns ``build(choices)``, kept in ``obj._choice_index`` with the version
+    of ``choices`` and rebuilt when the version changes.
+    """
+    version = choices_version(choices)
+    cached = obj._choice_index
+    if cached is None or cached[0] != version:
+        cached = obj._choice_index = (version, build(choices))
+    return cached[1]
+
+
+def resolve_labels(choices):
+    """
+    Returns ``choices`` with their labels translated to the active language
+    and escaped. For versioned choices the result is kept in
+    ``label_cache``, so lazy labels are resolved once per version and
+    language.
+    """
+    version = choices_version(choices)
+    if version is None:
+        return _resolve_labels(choices)
+    key = label_cache.make_key(version)
+    resolved = label_cache.get(key)
+    if resolved is None:
+        resolved = _resolve_labels(choices)
+        label_cache.set(key, resolved)
+    return resolved
+
+
+def _resolve_labels(choices):
+    return tuple(
+        (choice_value,
+         _resolve_labels(choice_label) if isinstance(choice_label, (list, tuple))
+         else conditional_escape(force_text(choice_label)))
+        for choice_value, choice_label in choices
+    )
+
+
+def is_lazy_choice_source(choices):
+    return callable(choices) or isinstance(choices, (QuerySet, LazyChoices))
+
+
+def choices_version(choices):
+    """
+    Returns a token that changes every time lazy choices are evaluated again
+    or choices with a new content are frozen, or None for a plain list of
+    choices.
+    """
+    if isinstance(choices, LazyChoices):
+        return choices._resolve_state()[1]
+    if isinstance(choices, FrozenChoices):
+        return choices.version
+    return None
+
+
+class LazyChoices(object):
+    """
+    Choices taken from a callable, a queryset or another LazyChoices.
+
+    The source is evaluated the first time the choices are iterated and the
+    result is kept for ``ttl`` seconds (forever if ``ttl`` is None) or until
+    ``invalidate()`` is called. ``prepare``, if given, is applied to the
+    evaluated list. Copies of a form share the instance of the declared
+    field, so the source is evaluated once per TTL instead of once per form.
+    """
+
+    def __init__(self, source, ttl=None, prepare=None):
+        self.source = source
+        self.ttl = ttl
+        self.prepare = prepare
+        # (choices, version, derived values) of the last evaluation. It is
+        # replaced as a whole, so a reader never mixes two evaluations.
+        self._state = None
+        self._expires_at = None
+        self._source_version = None
+        self._lock = threading.Lock()
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    @property
+    def version(self):
+        """Version of the last evaluation, None if there's none."""
+        state = self._state
+        return None if state is None else state[1]
+
+    def resolve(self):
+        """Returns the list of choices, evaluating the source if needed."""
+        return self._resolve_state()[0]
+
+    def evaluated(self):
+        """Returns the evaluated choices, or None, without evaluating the source."""
+        state = self._state
+        return None if state is None else state[0]
+
+    def _resolve_state(self):
+        state = self._state
+        if state is None or self._is_stale():
+            with self._lock:
+                state = self._state
+                if state is None or self._is_stale():
+                    state = self._evaluate()
+        return state
+
+    def _is_stale(self):
+        if self._expires_at is not None and time.time() >= self._expires_at:
+            return True
+        return isinstance(self.source, LazyChoices) and choices_version(self.source) != self._source_version
+
+    def _evaluate(self):
+        source = self.source
+        if isinstance(source, LazyChoices):
+            source_choices, self._source_version, source_derived = source._resolve_state()
+            choices = list(source_choices)
+        elif isinstance(source, QuerySet):
+            choices = [(obj.pk, force_text(obj)) for obj in source.all()]
+        else:
+            choices = list(source())
+        if self.prepare is not None:
+            choices = self.prepare(choices)
+        self._expires_at = None if self.ttl is None else time.time() + self.ttl
+        state = self._state = (choices, next(_versions), {})
+        return state
+
+    def derived(self, key, build):
+        """
+        Returns ``build(choices)``, computed once per evaluation of the choices
+        and shared by every field and widget using them.
+        """
+        choices, version, derived = self._resolve_state()
+        if key not in derived:
+            derived[key] = build(choices)
+        return derived[key]
+
+    def invalidate(self, *args, **kwargs):
+        """
+        Drops the evaluated choices. Accepts and ignores signal arguments, so
+        it can be connected to a signal directly.
+        """
+        with self._lock:
+            self._state = None
+
+    def invalidate_on(self, signal, sender=None):
+        """Invalidates the choices whenever ``signal`` is sent, e.g. ``post_save``."""
+        signal.connect(self.invalidate, sender=sender, weak=False)
+
+
+class IndexedChoiceField(forms.ChoiceField):
+    """
+    ChoiceField that validates against a set of the choice values, rebuilt
+    whenever the version of the choices changes, instead of scanning the
+    choices.
+
+    A list of choices is stored as FrozenChoices, so copies of the field
+    copy a list of references to the choices and share their index.
+    """
+
+    def __deepcopy__(self, memo):
+        if isinstance(self._choices, (FrozenChoices, LazyChoices)):
+            result = forms.Field.__deepcopy__(self, memo)
+            # The copied widget has the copy of the choices in the memo.
+            result._choices = result.widget.choices = copy.deepcopy(self._choices, memo)
+            return result
+        return super(IndexedChoiceField, self).__deepcopy__(memo)
+
+    def _set_choices(self, value):
+        if isinstance(value, LazyChoices):
+            self._choices = self.widget.choices = value
+        else:
+            super(IndexedChoiceField, self)._set_choices(value)
+            if isinstance(self._choices, list):
+                self._choices = self.widget.choices = freeze_choices(self._choices)
+        self._choice_index = None
+
+    choices = property(forms.ChoiceField._get_choices, _set_choices)
+
+    @property
+    def choice_index(self):
+        choices = self._choices
+        if isinstance(choices, LazyChoices):
+            return choices.derived(build_text_index, build_text_index)
+        return versioned_index(self, choices, build_text_index)
+
+    def valid_value(self, value):
+        "Check to see if the provided value is a valid choice"
+        return force_text(value) in self.choice_index
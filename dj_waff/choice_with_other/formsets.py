@@ -0,0 +1,125 @@
+from functools import partial
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.forms.formsets import BaseFormSet
+from django.utils.encoding import force_text
+from django.utils.functional import cached_property
+
+from . import ChoiceWithOtherField, CompiledSelect, LazyChoices, MISSING_OTHER_VALUE, OTHER_CHOICE
+from .fragments import FragmentCache
+
+
+def _list_choices(choices):
+    # list() would call ModelChoiceIterator.__len__, which runs its own query.
+    return [choice for choice in choices]
+
+
+class BaseChoiceWithOtherFormSet(BaseFormSet):
+    """
+    Formset for forms with ChoiceWithOtherFields.
+
+    The forms share the state that doesn't depend on the row: the compiled
+    choice markup and the choice indexes are shared through the declared
+    fields, and the options of a plain Select "other" widget are evaluated
+    once for all forms. The "other" values of ModelChoiceFields are looked up
+    with one query per field (per ``other_values_chunk_size`` values) instead
+    of one query per form.
+    """
+    other_values_chunk_size = 500
+
+    @cached_property
+    def forms(self):
+        form_list = super(BaseChoiceWithOtherFormSet, self).forms
+        self.share_other_choices(form_list)
+        return form_list
+
+    @cached_property
+    def other_choices_cache(self):
+        """
+        FragmentCache of the options compiled for the forms of this formset.
+        Their choices are evaluated again for every formset, so the options
+        aren't kept in the process-wide cache.
+        """
+        return FragmentCache()
+
+    def share_other_choices(self, form_list):
+        """
+        Replaces the plain Select "other" widgets of all forms by
+        CompiledSelects sharing one list of choices, evaluated the first time
+        one of them is rendered, so the options are rendered only once.
+        """
+        if not form_list:
+            return
+        for name, field in form_list[0].fields.items():
+            if not isinstance(field, ChoiceWithOtherField):
+                continue
+            # Other widgets (DeferredSelect, autocomplete widgets) only
+            # render the selected choices, and some rely on the queryset.
+            if type(field.widget.widgets[1]) is not forms.Select:
+                continue
+            choices = LazyChoices(partial(_list_choices, field.widget.widgets[1].choices))
+            for form in form_list:
+                widgets = form.fields[name].widget.widgets
+                widgets[1] = self.get_compiled_other_widget(widgets[1], choices)
+
+    def get_compiled_other_widget(self, widget, choices):
+        """Returns a CompiledSelect rendering like the Select ``widget``, with ``choices``."""
+        compiled_widget = CompiledSelect(attrs=widget.attrs)
+        compiled_widget.choices = choices
+        compiled_widget.is_required = widget.is_required
+        compiled_widget.is_localized = widget.is_localized
+        compiled_widget.fragment_cache = self.other_choices_cache
+        return compiled_widget
+
+    def full_clean(self):
+        if self.is_bound:
+            self.prefetch_other_values()
+        super(BaseChoiceWithOtherFormSet, self).full_clean()
+
+    def prefetch_other_values(self):
+        forms_to_clean = [self.forms[i] for i in range(self.total_form_count())]
+        if not forms_to_clean:
+            return
+        for name, field in forms_to_clean[0].fields.items():
+            if not isinstance(field, ChoiceWithOtherField) or not isinstance(field.fields[1], forms.ModelChoiceField):
+                continue
+            values = set()
+            for form in forms_to_clean:
+                value = form.fields[name].widget.value_from_datadict(form.data, form.files, form.add_prefix(name))
+                if value[0] == OTHER_CHOICE and value[1] not in field.fields[1].empty_values:
+                    values.add(force_text(value[1]))
+            prefetched = self.get_other_objects(field.fields[1], values)
+            for form in forms_to_clean:
+                form.fields[name].prefetched_other_values = prefetched
+
+    def get_other_objects(self, other_field, values):
+        """
+        Returns a dict mapping each of ``values`` to its object in the queryset
+        of ``other_field``, or to MISSING_OTHER_VALUE if there is none. Values
+        that aren't valid for the key field, or that match several objects,
+        are left out, so they are cleaned one by one.
+        """
+        model = other_field.queryset.model
+        key = other_field.to_field_name or model._meta.pk.name
+        key_field = model._meta.get_field(key)
+        values_by_key = {}
+        for value in values:
+            try:
+                values_by_key.setdefault(key_field.to_python(value), []).append(value)
+            except ValidationError:
+                continue
+        objects = dict((value, MISSING_OTHER_VALUE) for values in values_by_key.values() for value in values)
+        keys = list(values_by_key)
+        ambiguous = set()
+        for start in range(0, len(keys), self.other_values_chunk_size):
+            chunk = keys[start:start + self.other_values_chunk_size]
+            for obj in other_field.queryset.filter(**{key + '__in': chunk}):
+                for value in values_by_key.get(getattr(obj, key_field.attname), ()):
+                    if objects[value] is not MISSING_OTHER_VALUE:
+                        # ModelChoiceField raises MultipleObjectsReturned.
+                        ambiguous.add(value)
+                    objects[value] = obj
+        for value in ambiguous:
+            del objects[value]
+        return objects
@@ -0,0 +1,186 @@
+"""
+Precompiled HTML fragments for choice renderers.
+
+A choice list is rendered once into static markup with "slots" for the parts
+that change between renders: the field name, the ids, the ``checked``
+attribute of each radio input and the markup of the "other" widget. Later
+renders only patch those slots.
+"""
+from __future__ import unicode_literals
+
+import re
+import threading
+from collections import OrderedDict
+
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+CHECKED_HTML = ' checked="checked"'
+SELECTED_HTML = ' selected="selected"'
+
+# Marks the positions where a renderer template would insert its content.
+SPLIT_MARKER = '\x00'
+# Stand-ins for the field name and the id while a choice list is compiled.
+NAME_MARKER = '\x01'
+ID_MARKER = '\x02'
+
+_identity_marker_re = re.compile('([{}{}])'.format(NAME_MARKER, ID_MARKER))
+
+
+class CompiledChoices(object):
+    """
+    Static markup of a rendered choice list.
+
+    ``parts`` holds the markup, with an empty string at every slot position.
+    ``checked_slots`` maps a choice value to the positions that receive the
+    ``checked`` attribute, the other ``*_slots`` list the positions of the
+    "other" widget, the (escaped) field name and the (escaped) id.
+
+    ``checked_html`` is written in the checked slots of the rendered value,
+    only in the first one if ``first_only`` is set.
+    """
+
+    def __init__(self, parts, checked_slots, other_slots, name_slots=(), id_slots=(),
+                 checked_html=CHECKED_HTML, first_only=False):
+        self.parts = tuple(parts)
+        self.checked_slots = dict((k, tuple(v)) for k, v in checked_slots.items())
+        self.other_slots = tuple(other_slots)
+        self.name_slots = tuple(name_slots)
+        self.id_slots = tuple(id_slots)
+        self.checked_html = checked_html
+        self.first_only = first_only
+
+    def _fill(self, value, other_html, name, id_):
+        parts = list(self.parts)
+        for position in self.name_slots:
+            parts[position] = name
+        for position in self.id_slots:
+            parts[position] = id_
+        checked_positions = self.checked_slots.get(value, ())
+        if self.first_only:
+            checked_positions = checked_positions[:1]
+        for position in checked_positions:
+            parts[position] = self.checked_html
+        for position in self.other_slots:
+            parts[position] = other_html
+        return parts
+
+    def render(self, value, other_html='', name='', id_=''):
+        return mark_safe(''.join(self._fill(value, other_html, name, id_)))
+
+
+class FragmentBuilder(object):
+    """Collects static markup and slots while a choice list is compiled."""
+
+    def __init__(self):
+        self.parts = []
+        self.checked_slots = {}
+        self.other_slots = []
+        self.name_slots = []
+        self.id_slots = []
+        self._pending = []
+
+    def text(self, html):
+        """Adds static markup, turning name and id markers into slots."""
+        for token in _identity_marker_re.split(html):
+            if token == NAME_MARKER:
+                self.name_slots.append(self._slot())
+            elif token == ID_MARKER:
+                self.id_slots.append(self._slot())
+            elif token:
+                self._pending.append(token)
+
+    def checked_slot(self, value):
+        self.checked_slots.setdefault(value, []).append(self._slot())
+
+    def other_slot(self):
+        self.other_slots.append(self._slot())
+
+    def _slot(self):
+        self._flush()
+        self.parts.append('')
+        return len(self.parts) - 1
+
+    def _flush(self):
+        if self._pending:
+            self.parts.append(''.join(self._pending))
+            self._pending = []
+
+    def build(self, **kwargs):
+        self._flush()
+        return CompiledChoices(self.parts, self.checked_slots, self.other_slots,
+                               self.name_slots, self.id_slots, **kwargs)
+
+
+def split_at_marker(html):
+    """Returns the markup before and after ``SPLIT_MARKER`` in ``html``."""
+    before, _, after = html.partition(SPLIT_MARKER)
+    return before, after
+
+
+def freeze(value):
+    """Returns a hashable version of a choices list or an attrs dict."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, tuple):
+        # Frozen choices are used as they are instead of being rebuilt on
+        # every render.
+        try:
+            hash(value)
+        except TypeError:
+            pass
+        else:
+            return value
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class FragmentCache(object):
+    """
+    Thread-safe LRU mapping of cache keys to :class:`CompiledChoices` (or
+    other results that depend on the active language).
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def make_key(self, *parts):
+        """
+        Returns a key for ``parts`` plus the active language, or ``None`` when
+        some part can't be hashed and the result must not be cached.
+        """
+        key = tuple(freeze(part) for part in parts) + (get_language(),)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get(self, key):
+        with self._lock:
+            try:
+                compiled = self._data.pop(key)
+            except KeyError:
+                return None
+            self._data[key] = compiled
+            return compiled
+
+    def set(self, key, compiled):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = compiled
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,201 @@
+"""
+Optional measurements of the rendering and cleaning of ChoiceWithOtherFields.
+
+The package doesn't import this module. Until the code registering a sink
+imports it, an instrumented method costs one extra call and a lookup in
+``sys.modules``, then a check of ``sinks``. Once a sink is registered with
+``add_sink()``, every call of ``ChoiceWithOtherWidget.render``,
+``ChoiceWithOtherRenderer.render``, ``ChoiceWithOtherWidget.decompress`` and
+``ChoiceWithOtherField.clean`` is passed to its ``record(measurement)``
+method as a Measurement.
+"""
+from __future__ import division, unicode_literals
+
+import threading
+import time
+from collections import Counter, namedtuple
+from itertools import islice
+
+from django.db import connections
+from django.utils import six
+from django.utils.encoding import force_bytes
+
+from .choices import LazyChoices, flatten_choice_values
+
+default_timer = getattr(time, 'perf_counter', time.time)
+
+# Registered sinks. Instrumented methods only measure while it isn't empty.
+sinks = []
+
+_local = threading.local()
+
+
+class Measurement(namedtuple('Measurement', 'kind name choices bytes duration queries cache')):
+    """
+    One call of an instrumented method.
+
+    ``kind`` is ``'widget.render'``, ``'renderer.render'``,
+    ``'widget.decompress'`` or ``'field.clean'``. ``name`` is the HTML name
+    of the field (``<name>_0`` for a renderer), ``choices`` the number of
+    choices including the "other" one (None if they weren't evaluated yet,
+    e.g. a queryset), ``bytes`` the size of the rendered
+    HTML (None for decompress and clean) and ``duration`` the time spent in
+    seconds. ``queries`` lists the
+    SQL executed during the call, mostly by the "other" field and by lazy
+    choices; the queries of a renderer are also counted in its widget's
+    render. ``cache`` is ``'hit'``, ``'miss'`` or ``'bypass'`` for the
+    renders of a widget with a ``render_cache``, None otherwise.
+    """
+    __slots__ = ()
+
+
+def add_sink(sink):
+    """Starts passing measurements to ``sink.record()``."""
+    if sink not in sinks:
+        sinks.append(sink)
+
+
+def remove_sink(sink):
+    """Stops passing measurements to ``sink``."""
+    if sink in sinks:
+        sinks.remove(sink)
+
+
+class recording(object):
+    """
+    Context manager that registers ``sink`` (a new MemorySink if not given)
+    while the block runs::
+
+        with recording() as sink:
+            form.as_p()
+        sink.count('widget.render')
+    """
+
+    def __init__(self, sink=None):
+        self.sink = MemorySink() if sink is None else sink
+
+    def __enter__(self):
+        add_sink(self.sink)
+        return self.sink
+
+    def __exit__(self, *exc_info):
+        remove_sink(self.sink)
+
+
+class MemorySink(object):
+    """Keeps the measurements in a list, for tests and debugging."""
+
+    # Upper bounds in seconds of the buckets of histogram().
+    histogram_bounds = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.measurements = []
+
+    def record(self, measurement):
+        with self._lock:
+            self.measurements.append(measurement)
+
+    def clear(self):
+        with self._lock:
+            self.measurements = []
+
+    def filter(self, kind=None, name=None):
+        """Returns the measurements of ``kind`` and ``name``, when given."""
+        return [m for m in self.measurements
+                if (kind is None or m.kind == kind) and (name is None or m.name == name)]
+
+    def count(self, kind=None, name=None):
+        return len(self.filter(kind, name))
+
+    def counts(self):
+        """Returns a Counter of the measurements per kind."""
+        return Counter(m.kind for m in self.measurements)
+
+    def histogram(self, kind=None, name=None):
+        """
+        Returns a list of (upper bound, count) of the durations, the last
+        bucket (bound None) holding the durations above every bound.
+        """
+        counts = [0] * (len(self.histogram_bounds) + 1)
+        for m in self.filter(kind, name):
+            index = 0
+            while index < len(self.histogram_bounds) and m.duration > self.histogram_bounds[index]:
+                index += 1
+            counts[index] += 1
+        return list(zip(self.histogram_bounds + (None,), counts))
+
+
+def current_name():
+    """Returns the name of the innermost call being measured in this thread, or None."""
+    active = getattr(_local, 'active', None)
+    return active[-1]['name'] if active else None
+
+
+def note_cache(status):
+    """Reports the render cache lookup of the innermost measured call."""
+    active = getattr(_local, 'active', None)
+    if active:
+        active[-1]['cache'] = status
+
+
+def measure(kind, get_name, method, obj, args, kwargs):
+    """
+    Calls ``method`` and passes its Measurement to the sinks. ``get_name``
+    returns the field name from the instance and the arguments; without it
+    (or if it returns None), the name of the enclosing measured call is used.
+    """
+    field_name = get_name(obj, args, kwargs) if get_name is not None else None
+    record = {'name': field_name if field_name is not None else current_name(), 'cache': None}
+    active = getattr(_local, 'active', None)
+    if active is None:
+        active = _local.active = []
+    active.append(record)
+    positions = _start_capture()
+    result = None
+    start = default_timer()
+    try:
+        result = method(obj, *args, **kwargs)
+        return result
+    finally:
+        duration = default_timer() - start
+        queries = _stop_capture(positions)
+        active.pop()
+        measurement = Measurement(kind, record['name'], _count_choices(getattr(obj, 'choices', ())),
+                                  _size(result), duration, queries, record['cache'])
+        for sink in list(sinks):
+            sink.record(measurement)
+
+
+def _start_capture():
+    # Same as CaptureQueriesContext, without opening a connection.
+    positions = []
+    for connection in connections.all():
+        positions.append((connection, connection.force_debug_cursor, len(connection.queries_log)))
+        connection.force_debug_cursor = True
+    return positions
+
+
+def _stop_capture(positions):
+    queries = []
+    for connection, force_debug_cursor, start in positions:
+        connection.force_debug_cursor = force_debug_cursor
+        queries.extend(query['sql'] for query in islice(connection.queries_log, start, None))
+    return tuple(queries)
+
+
+def _count_choices(choices):
+    # Counted after the capture of the queries, so only choices that are
+    # already evaluated are counted: iterating a ModelChoiceIterator or
+    # evaluating LazyChoices again would run queries of their own.
+    if isinstance(choices, LazyChoices):
+        choices = choices.evaluated()
+    if not isinstance(choices, (list, tuple)):
+        return None
+    return sum(1 for value in flatten_choice_values(choices))
+
+
+def _size(result):
+    if isinstance(result, six.string_types):
+        return len(force_bytes(result))
+    return None
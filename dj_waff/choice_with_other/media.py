@@ -0,0 +1,74 @@
+"""
+Media of forms with many widgets, computed once per form class.
+"""
+from __future__ import unicode_literals
+
+from django.forms import Media
+
+from .fragments import FragmentCache
+
+media_cache = FragmentCache()
+
+
+def merge_media(media_list):
+    """
+    Returns the sum of ``media_list`` as one Media, in the order Media's
+    ``+`` gives. Each path is looked up in a set instead of in the lists of
+    the partial sums, so n widgets with a script each take linear instead of
+    quadratic time.
+    """
+    media = Media()
+    if hasattr(media, '_js_lists'):
+        # Django 2.0+ merges the lists of each Media in order.
+        return sum(media_list, media)
+    js, js_paths = [], set()
+    css, css_paths = {}, {}
+    for widget_media in media_list:
+        for path in widget_media._js:
+            if path not in js_paths:
+                js_paths.add(path)
+                js.append(path)
+        for medium, paths in widget_media._css.items():
+            added = css_paths.setdefault(medium, set())
+            for path in paths:
+                if path not in added:
+                    added.add(path)
+                    css.setdefault(medium, []).append(path)
+    media._js = js
+    media._css = css
+    return media
+
+
+def _widget_key(widget):
+    """
+    Returns the classes of ``widget`` and of its subwidgets, which decide
+    its media.
+    """
+    subwidgets = getattr(widget, 'widgets', None)
+    if subwidgets is None:
+        return type(widget)
+    return (type(widget),) + tuple(map(_widget_key, subwidgets))
+
+
+class CachedMediaMixin(object):
+    """
+    Form mixin that adds up the media of the widgets once per form class
+    (and set of widget classes, for fields added in ``__init__``) instead
+    of on every access of ``form.media``. The sum is made by
+    ``merge_media()``.
+
+    Only use it when the media of the widgets depend on their class alone.
+    The returned Media is shared by all forms and must not be changed.
+    """
+    media_cache = media_cache
+
+    @property
+    def media(self):
+        key = self.media_cache.make_key(
+            type(self), tuple([(name, _widget_key(field.widget)) for name, field in self.fields.items()]))
+        media = self.media_cache.get(key) if key is not None else None
+        if media is None:
+            media = merge_media([field.widget.media for field in self.fields.values()])
+            if key is not None:
+                self.media_cache.set(key, media)
+        return media
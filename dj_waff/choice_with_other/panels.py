@@ -0,0 +1,95 @@
+"""
+django-debug-toolbar panel listing the ChoiceWithOtherFields rendered and
+cleaned during a request. Add it to ``DEBUG_TOOLBAR_PANELS``::
+
+    DEBUG_TOOLBAR_PANELS = [
+        ...
+        'dj_waff.choice_with_other.panels.ChoiceWithOtherPanel',
+    ]
+"""
+from __future__ import absolute_import, division, unicode_literals
+
+import threading
+from collections import OrderedDict
+
+from django.utils.translation import ugettext_lazy as _, ungettext
+
+from debug_toolbar.panels import Panel
+
+from . import instrumentation
+
+# The kinds of measurements listed, the renderer and decompress calls are
+# included in the widget renders.
+PANEL_KINDS = ('widget.render', 'field.clean')
+
+
+class ChoiceWithOtherPanel(Panel):
+    """
+    Shows the render time, the HTML size, the number of choices, the render
+    cache lookups and the SQL of every ChoiceWithOtherField of the request,
+    the most expensive field first.
+    """
+    title = _('Choice with other fields')
+    template = 'dj_waff/choice_with_other/panel.html'
+
+    def __init__(self, *args, **kwargs):
+        super(ChoiceWithOtherPanel, self).__init__(*args, **kwargs)
+        self.measurements = []
+        self._thread = None
+
+    @property
+    def nav_subtitle(self):
+        stats = self.get_stats()
+        fields = len(stats.get('fields', ()))
+        return ungettext('%(fields)d field in %(time).2fms', '%(fields)d fields in %(time).2fms', fields) % {
+            'fields': fields, 'time': stats.get('total_time', 0)}
+
+    def record(self, measurement):
+        # The sink is shared by every thread, only the request's own calls
+        # are kept.
+        if threading.current_thread() is self._thread and measurement.kind in PANEL_KINDS:
+            self.measurements.append(measurement)
+
+    def enable_instrumentation(self):
+        self._thread = threading.current_thread()
+        instrumentation.add_sink(self)
+
+    def disable_instrumentation(self):
+        instrumentation.remove_sink(self)
+
+    def generate_stats(self, request, response):
+        fields = OrderedDict()
+        calls = []
+        for measurement in self.measurements:
+            field = fields.get(measurement.name)
+            if field is None:
+                field = fields[measurement.name] = {
+                    'name': measurement.name, 'renders': 0, 'render_time': 0, 'clean_time': 0, 'bytes': 0,
+                    'choices': measurement.choices, 'cache_hits': 0, 'cache_misses': 0, 'queries': 0,
+                }
+            duration = measurement.duration * 1000
+            if measurement.kind == 'widget.render':
+                field['renders'] += 1
+                field['render_time'] += duration
+                field['bytes'] += measurement.bytes or 0
+            else:
+                field['clean_time'] += duration
+            field['cache_hits'] += measurement.cache == 'hit'
+            field['cache_misses'] += measurement.cache == 'miss'
+            field['queries'] += len(measurement.queries)
+            calls.append({
+                'name': measurement.name,
+                'kind': measurement.kind,
+                'time': duration,
+                'bytes': measurement.bytes,
+                'cache': measurement.cache,
+                'queries': measurement.queries,
+            })
+        fields = sorted(fields.values(), key=lambda f: f['render_time'] + f['clean_time'], reverse=True)
+        self.record_stats({
+            'fields': fields,
+            'calls': calls,
+            'total_time': sum(f['render_time'] + f['clean_time'] for f in fields),
+            'total_bytes': sum(f['bytes'] for f in fields),
+            'total_queries': sum(f['queries'] for f in fields),
+        })
@@ -0,0 +1,63 @@
+"""
+Assertions to keep the rendering of forms and formsets with
+ChoiceWithOtherFields within a budget of queries, time and HTML size.
+"""
+from __future__ import division, unicode_literals
+
+from django.utils.encoding import force_bytes, force_text
+
+from .instrumentation import default_timer, recording
+
+
+def render_form(form):
+    """Renders a form or a formset the way ``{{ form }}`` does."""
+    return force_text(form)
+
+
+class ChoiceWithOtherAssertionsMixin(object):
+    """
+    TestCase mixin with rendering budgets for forms and formsets::
+
+        class DocumentFormTests(ChoiceWithOtherAssertionsMixin, TestCase):
+            def test_budget(self):
+                form = DocumentForm()
+                self.assertWidgetQueries(form, 1)
+                self.assertRenderUnder(form, 20)
+                self.assertHtmlBytesUnder(form, 50000)
+
+    ``render`` renders the form, ``render_form()`` by default.
+    """
+
+    def assertWidgetQueries(self, form, num, render=render_form):
+        """
+        Asserts that rendering the ChoiceWithOtherWidgets of ``form`` runs
+        ``num`` queries, e.g. one per ModelChoiceField "other" field.
+        """
+        with recording() as sink:
+            render(form)
+        renders = sink.filter('widget.render')
+        executed = sum(len(m.queries) for m in renders)
+        if executed != num:
+            details = '\n'.join('{}: {}'.format(m.name, sql) for m in renders for sql in m.queries)
+            self.fail('{} queries executed by the widgets, {} expected\n{}'.format(executed, num, details))
+
+    def assertRenderUnder(self, form, ms, render=render_form, repeat=3):
+        """
+        Asserts that the best of ``repeat`` renders of ``form`` takes less
+        than ``ms`` milliseconds. The first render, which fills the caches,
+        counts as one of them.
+        """
+        best = None
+        for i in range(repeat):
+            start = default_timer()
+            render(form)
+            duration = (default_timer() - start) * 1000
+            best = duration if best is None else min(best, duration)
+        if best >= ms:
+            self.fail('Rendering took {:.2f} ms, the budget is {} ms'.format(best, ms))
+
+    def assertHtmlBytesUnder(self, form, size, render=render_form):
+        """Asserts that ``form`` renders to less than ``size`` bytes of UTF-8."""
+        html_bytes = len(force_bytes(render(form)))
+        if html_bytes >= size:
+            self.fail('The form renders to {} bytes, the budget is {} bytes'.format(html_bytes, size))
@@ -0,0 +1,42 @@
+from django.http import HttpResponseBadRequest, JsonResponse
+from django.utils.encoding import force_text
+from django.views.generic import View
+
+
+class OtherChoicesView(View):
+    """
+    Returns one page of ``queryset`` as JSON for a DeferredSelect::
+
+        {"results": [{"id": "1", "text": "First"}, ...], "more": true}
+
+    The page number is taken from the ``page`` GET parameter.
+    """
+    queryset = None
+    paginate_by = 100
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_result_value(self, result):
+        return force_text(result.pk)
+
+    def get_result_label(self, result):
+        return force_text(result)
+
+    def get(self, request, *args, **kwargs):
+        try:
+            page = int(request.GET.get('page', 1))
+        except ValueError:
+            page = 0
+        if page < 1:
+            return HttpResponseBadRequest()
+        offset = (page - 1) * self.paginate_by
+        # One extra row tells whether there is a next page, without a COUNT query.
+        results = list(self.get_queryset()[offset:offset + self.paginate_by + 1])
+        return JsonResponse({
+            'results': [
+                {'id': self.get_result_value(result), 'text': self.get_result_label(result)}
+                for result in results[:self.paginate_by]
+            ],
+            'more': len(results) > self.paginate_by,
+        })
@@ -1,28 +1,313 @@
-$(document).ready(
-    function () {
-        "use strict";
-        var choice_with_other_wrappers = $(".choice_with_other_wrapper");
-        var uncheck_check_last = function (selector, last_radio_choice_input_id) {
-            $('input[name="' + selector + '"]').each(function () {
-                if ($(this).attr('id') === last_radio_choice_input_id) {
-                    $(this).prop('checked', true);
-                }
-                else {
-                    $(this).prop('checked', false);
+/*
+ * Behaviour of ChoiceWithOtherWidget. One delegated listener per event type
+ * on the document handles every widget on the page, including widgets added
+ * later, and only looks at the elements around the event target.
+ */
+(function () {
+    "use strict";
+    if (window.djWaffChoiceWithOther) {
+        return;
+    }
+
+    var matches = function (element, selector) {
+        var match = element.matches || element.msMatchesSelector || element.webkitMatchesSelector;
+        return element.nodeType === 1 && match.call(element, selector);
+    };
+
+    var closest = function (element, selector) {
+        while (element && element.nodeType === 1) {
+            if (matches(element, selector)) {
+                return element;
+            }
+            element = element.parentNode;
+        }
+        return null;
+    };
+
+    var OTHER_CHOICE = '__other__';
+
+    // The radio input of the "other" choice shares its <label> with the
+    // "other" field.
+    var other_radio = function (other_field) {
+        var label = closest(other_field, '.other-field');
+        label = label && label.parentNode;
+        return label ? label.querySelector('input[type="radio"]') : null;
+    };
+
+    // In the select layout (ChoiceWithOtherWidget.select_layout) the "other"
+    // field follows the select of the choices.
+    var choice_select = function (other_field) {
+        var slot = closest(other_field, '.other-field');
+        var select = slot && slot.previousElementSibling;
+        return select && matches(select, 'select[data-choice-fields]') ? select : null;
+    };
+
+    var deferred_state = function (select) {
+        if (!select.djWaffDeferred) {
+            select.djWaffDeferred = {page: 0, loading: false, done: false, previous_value: select.value};
+        }
+        return select.djWaffDeferred;
+    };
+
+    // Fetches the next page of options of a select rendered by DeferredSelect.
+    var load_deferred_choices = function (select) {
+        var state = deferred_state(select);
+        if (state.loading || state.done) {
+            return;
+        }
+        var page = state.page + 1;
+        var url = select.getAttribute('data-deferred-choices-url');
+        var request = new window.XMLHttpRequest();
+        state.loading = true;
+        request.open('GET', url + (url.indexOf('?') === -1 ? '?' : '&') + 'page=' + page);
+        request.setRequestHeader('X-Requested-With', 'XMLHttpRequest');
+        request.onload = function () {
+            state.loading = false;
+            if (request.status !== 200) {
+                return;
+            }
+            var data = JSON.parse(request.responseText);
+            var selected_value = select.value;
+            var load_more = select.querySelector('option[data-load-more]');
+            if (load_more) {
+                select.removeChild(load_more);
+            }
+            var options = document.createDocumentFragment();
+            data.results.forEach(function (result) {
+                if (String(result.id) !== selected_value) {
+                    var option = document.createElement('option');
+                    option.value = result.id;
+                    option.textContent = result.text;
+                    options.appendChild(option);
                 }
             });
+            if (data.more) {
+                load_more = document.createElement('option');
+                load_more.value = '';
+                load_more.textContent = '…';
+                load_more.setAttribute('data-load-more', '');
+                options.appendChild(load_more);
+            }
+            else {
+                state.done = true;
+            }
+            select.appendChild(options);
+            state.page = page;
         };
-        choice_with_other_wrappers.each(function () {
-            var other_choice = $(this).find('[data-choice-fields-other]');
-            var last_radio_choice_input = $(this).find('input:radio').last();
-            other_choice.on('click', function () {
-                uncheck_check_last(last_radio_choice_input.attr('name'), last_radio_choice_input.attr('id'));
-                console.log('clock');
-            });
-            // other_choice.on('change', function () {
-            //     uncheck_check_last(last_radio_choice_input.attr('name'), last_radio_choice_input.attr('id'));
-            //     // last_radio_choice_input.prop('checked', true);
-            // });
+        request.onerror = function () {
+            state.loading = false;
+        };
+        request.send();
+    };
+
+    var deferred_select_of = function (radio) {
+        return radio.parentNode.querySelector('select[data-deferred-choices-url]');
+    };
+
+    var fire_change = function (element) {
+        var event = document.createEvent('HTMLEvents');
+        event.initEvent('change', true, false);
+        element.dispatchEvent(event);
+    };
+
+    document.addEventListener('click', function (event) {
+        var other_field = closest(event.target, '[data-choice-fields-other]');
+        if (other_field) {
+            var select = choice_select(other_field);
+            if (select) {
+                if (select.value !== OTHER_CHOICE) {
+                    select.value = OTHER_CHOICE;
+                    fire_change(select);
+                }
+                return;
+            }
+            var radio = other_radio(other_field);
+            if (radio && !radio.checked) {
+                // Checking a radio unchecks the others of its group.
+                radio.checked = true;
+                fire_change(radio);
+            }
+        }
+    });
+
+    // Virtualized lists (ChoiceWithOtherWidget.virtualized): only the rows
+    // scrolled into view exist in the document, the value is kept in a
+    // hidden input. The state is built on the first event of a list.
+    var OVERSCAN = 5;
+
+    var request_frame = function (callback) {
+        if (window.requestAnimationFrame) {
+            return window.requestAnimationFrame(callback);
+        }
+        return window.setTimeout(callback, 16);
+    };
+
+    var virtual_state = function (container) {
+        if (!container.djWaffVirtual) {
+            var rows = JSON.parse(container.querySelector('script[data-virtual-choices]').textContent);
+            var viewport = container.querySelector('[data-virtual-viewport]');
+            var row_height = parseInt(container.getAttribute('data-row-height'), 10);
+            container.djWaffVirtual = {
+                rows: rows,
+                texts: rows.map(function (row) {
+                    return row[row.length - 1].toLowerCase();
+                }),
+                shown: rows.map(function (row, index) {
+                    return index;
+                }),
+                input: container.querySelector('input[type="hidden"]'),
+                other: container.querySelector('input[data-virtual-other]'),
+                viewport: viewport,
+                list: viewport.querySelector('ul'),
+                row_height: row_height,
+                visible_rows: Math.ceil(viewport.clientHeight / row_height) || 10,
+                pending: false
+            };
+        }
+        return container.djWaffVirtual;
+    };
+
+    var virtual_row = function (row, value) {
+        var item = document.createElement('li');
+        if (row.length === 1) {
+            item.className = 'optgroup';
+            item.textContent = row[0];
+            return item;
+        }
+        var label = document.createElement('label');
+        var input = document.createElement('input');
+        input.type = 'radio';
+        input.value = row[0];
+        input.setAttribute('data-virtual-choice', '');
+        input.checked = row[0] === value;
+        label.appendChild(input);
+        label.appendChild(document.createTextNode(' ' + row[1]));
+        item.appendChild(label);
+        return item;
+    };
+
+    var render_rows = function (state) {
+        var count = state.shown.length;
+        var first = Math.max(0, Math.floor(state.viewport.scrollTop / state.row_height) - OVERSCAN);
+        var last = Math.min(count, first + state.visible_rows + 2 * OVERSCAN);
+        var rows = document.createDocumentFragment();
+        for (var i = first; i < last; i++) {
+            rows.appendChild(virtual_row(state.rows[state.shown[i]], state.input.value));
+        }
+        state.list.textContent = '';
+        state.list.appendChild(rows);
+        state.list.style.paddingTop = (first * state.row_height) + 'px';
+        state.list.style.paddingBottom = ((count - last) * state.row_height) + 'px';
+    };
+
+    // Lists whose selected choice is further down are rendered with the rows
+    // from that choice on and a data-scroll-top, scroll them to it. Call
+    // djWaffChoiceWithOther.scroll_virtual_lists() for lists added later.
+    var scroll_virtual_lists = function (root) {
+        var viewports = (root || document).querySelectorAll('[data-virtual-viewport][data-scroll-top]');
+        for (var i = 0; i < viewports.length; i++) {
+            viewports[i].scrollTop = parseInt(viewports[i].getAttribute('data-scroll-top'), 10);
+            viewports[i].removeAttribute('data-scroll-top');
+        }
+    };
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', function () {
+            scroll_virtual_lists();
         });
     }
-);
+    else {
+        scroll_virtual_lists();
+    }
+
+    // Scroll events don't bubble, they are caught on their way down.
+    document.addEventListener('scroll', function (event) {
+        var viewport = event.target;
+        if (viewport.nodeType !== 1 || !matches(viewport, '[data-virtual-viewport]')) {
+            return;
+        }
+        var state = virtual_state(closest(viewport, '.choice_with_other_virtual'));
+        if (!state.pending) {
+            state.pending = true;
+            request_frame(function () {
+                state.pending = false;
+                render_rows(state);
+            });
+        }
+    }, true);
+
+    document.addEventListener('input', function (event) {
+        if (!matches(event.target, 'input[data-virtual-filter]')) {
+            return;
+        }
+        var state = virtual_state(closest(event.target, '.choice_with_other_virtual'));
+        var query = event.target.value.toLowerCase();
+        state.shown = [];
+        for (var i = 0; i < state.rows.length; i++) {
+            // Group headings are only shown when the list isn't filtered.
+            if (!query || (state.rows[i].length === 2 && state.texts[i].indexOf(query) !== -1)) {
+                state.shown.push(i);
+            }
+        }
+        state.viewport.scrollTop = 0;
+        render_rows(state);
+    });
+
+    var on_virtual_change = function (target) {
+        var state = virtual_state(closest(target, '.choice_with_other_virtual'));
+        state.input.value = target.value;
+        var checked = state.list.querySelectorAll('input:checked');
+        for (var i = 0; i < checked.length; i++) {
+            if (checked[i] !== target) {
+                checked[i].checked = false;
+            }
+        }
+        if (target !== state.other) {
+            state.other.checked = false;
+        }
+    };
+
+    var on_deferred_activation = function (event) {
+        var select = closest(event.target, 'select[data-deferred-choices-url]');
+        if (select) {
+            deferred_state(select);
+            load_deferred_choices(select);
+        }
+    };
+    document.addEventListener('focusin', on_deferred_activation);
+    document.addEventListener('mousedown', on_deferred_activation);
+
+    document.addEventListener('change', function (event) {
+        var target = event.target;
+        if (matches(target, 'input[data-virtual-choice], input[data-virtual-other]')) {
+            if (target.checked) {
+                on_virtual_change(target);
+            }
+        }
+        if (matches(target, 'input[type="radio"][data-choice-fields], input[data-virtual-other]')) {
+            var select = deferred_select_of(target);
+            if (select && target.checked) {
+                load_deferred_choices(select);
+            }
+        }
+        else if (matches(target, 'select[data-choice-fields]')) {
+            var other_select = deferred_select_of(target);
+            if (other_select && target.value === OTHER_CHOICE) {
+                load_deferred_choices(other_select);
+            }
+        }
+        else if (matches(target, 'select[data-deferred-choices-url]')) {
+            var state = deferred_state(target);
+            var selected = target.options[target.selectedIndex];
+            if (selected && selected.hasAttribute('data-load-more')) {
+                target.value = state.previous_value;
+                load_deferred_choices(target);
+            }
+            state.previous_value = target.value;
+        }
+    });
+
+    window.djWaffChoiceWithOther = {
+        load_deferred_choices: load_deferred_choices,
+        scroll_virtual_lists: scroll_virtual_lists
+    };
+}());
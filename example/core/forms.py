@@ -1,7 +1,8 @@
 from dal import autocomplete
 from django import forms
+from django.db.models.signals import post_save
 
-from dj_waff.choice_with_other import ChoiceWithOtherField
+from dj_waff.choice_with_other import ChoiceWithOtherField, LazyChoices
 from .models import DocumentTemplate
 
 SET_OF_CHOICES = [
@@ -10,6 +11,10 @@ SET_OF_CHOICES = [
     # ('choice3', lambda b: DocumentTemplate.objects.get(pk=1)),
 ]
 
+# evaluated on first render, then cached for 5 minutes or until a DocumentTemplate is saved
+DOCUMENT_TEMPLATE_CHOICES = LazyChoices(DocumentTemplate.objects.order_by('-pk')[:5], ttl=300)
+DOCUMENT_TEMPLATE_CHOICES.invalidate_on(post_save, sender=DocumentTemplate)
+
 
 class MyCustomForm(forms.Form):
     other_form_field = forms.CharField(required=False)
@@ -19,7 +24,8 @@ class MyCustomForm(forms.Form):
             queryset=DocumentTemplate.objects.all(),
             required=True,
             # widget=autocomplete.ModelSelect2(url='document-template-autocomplete', ),
-        )
+        ),
+        other_choices_url='document-template-other-choices',
     )
     document_template2 = ChoiceWithOtherField(
         choices=SET_OF_CHOICES,
@@ -53,6 +59,11 @@ class MyCustomForm(forms.Form):
         )
     )
 
+    document_template6 = ChoiceWithOtherField(
+        choices=DOCUMENT_TEMPLATE_CHOICES,
+        other_form_field=forms.CharField()
+    )
+
     maria = forms.ModelChoiceField(
         queryset=DocumentTemplate.objects.all(),
         required=True,
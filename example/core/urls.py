@@ -7,4 +7,5 @@ from . import views
 urlpatterns = [
     url(r'^$', views.DocumentTemplateFormView.as_view(), name='home'),
     url(r'~a', views.DocumentTemplateAutocomplete.as_view(), name='document-template-autocomplete'),
+    url(r'~o', views.DocumentTemplateOtherChoices.as_view(), name='document-template-other-choices'),
 ]
@@ -1,11 +1,14 @@
 from dal import autocomplete
 from django.db.models import Q
+from django.core.urlresolvers import reverse_lazy
 from django.shortcuts import render
 from django.utils import six
 from django.utils.decorators import method_decorator
 from django.views import generic
 from django.views.decorators.cache import never_cache
 
+from dj_waff.choice_with_other.views import OtherChoicesView
+
 from .models import DocumentTemplate
 from .forms import MyCustomForm
 
@@ -13,6 +16,7 @@ from .forms import MyCustomForm
 class DocumentTemplateFormView(generic.FormView):
     template_name = 'core/document_form.html'
     form_class = MyCustomForm
+    success_url = reverse_lazy('home')
 
 
 class DocumentTemplateAutocomplete(autocomplete.Select2QuerySetView):
@@ -29,3 +33,7 @@ class DocumentTemplateAutocomplete(autocomplete.Select2QuerySetView):
 
     def get_result_label(self, result):
         return six.text_type(result.name)
+
+
+class DocumentTemplateOtherChoices(OtherChoicesView):
+    queryset = DocumentTemplate.objects.order_by('pk')
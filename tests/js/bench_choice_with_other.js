@@ -0,0 +1,56 @@
+'use strict';
+
+// Timings of choice_with_other.js in jsdom: loading the script, clicking
+// "other" fields and adding rows on pages with a growing number of widgets.
+// Run with `npm run bench` in this directory.
+
+const {performance} = require('perf_hooks');
+
+const {createWindow, loadScript, widgetHtml} = require('./fixtures');
+
+const CLICKS = 1000;
+const ADDED_ROWS = 200;
+
+function bench(widgets) {
+    const html = [];
+    for (let i = 0; i < widgets; i++) {
+        html.push(widgetHtml('field' + i, {choices: 10, value: 'choice1'}));
+    }
+    const window = createWindow(html.join(''));
+    const document = window.document;
+
+    let start = performance.now();
+    loadScript(window);
+    const loadMs = performance.now() - start;
+
+    const others = [];
+    for (let i = 0; i < CLICKS; i++) {
+        others.push(document.getElementById('id_field' + ((i * 7919) % widgets) + '_1'));
+    }
+    start = performance.now();
+    others.forEach(function (other) {
+        other.dispatchEvent(new window.MouseEvent('click', {bubbles: true}));
+    });
+    const clickUs = (performance.now() - start) / CLICKS * 1000;
+
+    // Rows added like a formset's "add row" button: each one must work
+    // right away, without rescanning the page.
+    const form = document.querySelector('form');
+    start = performance.now();
+    for (let i = 0; i < ADDED_ROWS; i++) {
+        const row = document.createElement('div');
+        row.innerHTML = widgetHtml('added' + i, {choices: 10});
+        form.appendChild(row);
+        document.getElementById('id_added' + i + '_1').dispatchEvent(new window.MouseEvent('click', {bubbles: true}));
+    }
+    const addUs = (performance.now() - start) / ADDED_ROWS * 1000;
+    window.close();
+    return {loadMs: loadMs, clickUs: clickUs, addUs: addUs};
+}
+
+[100, 1000, 5000].forEach(function (widgets) {
+    const result = bench(widgets);
+    console.log(String(widgets).padStart(6) + ' widgets  load ' + result.loadMs.toFixed(2).padStart(8) + ' ms  click ' +
+                result.clickUs.toFixed(1).padStart(8) + ' us  add row and click ' +
+                result.addUs.toFixed(1).padStart(8) + ' us');
+});
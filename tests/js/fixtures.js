@@ -0,0 +1,132 @@
+'use strict';
+
+// Markup of ChoiceWithOtherWidget and a jsdom window running the script.
+
+const fs = require('fs');
+const path = require('path');
+const {JSDOM} = require('jsdom');
+
+const SCRIPT = fs.readFileSync(
+    path.join(__dirname, '..', '..', 'dj_waff', 'static', 'dj_waff', 'choice_with_other.js'), 'utf8');
+
+function radio(name, index, value, label, checked, otherHtml) {
+    const id = 'id_' + name + '_0_' + index;
+    return '<li><label for="' + id + '"><input' + (checked ? ' checked="checked"' : '') +
+        ' data-choice-fields="' + name + '_0" id="' + id + '" name="' + name + '_0" type="radio" value="' +
+        value + '" /> ' + label + (otherHtml === undefined ? '' : '<div class="other-field">' + otherHtml + '</div>') +
+        '</label></li>';
+}
+
+function widgetHtml(name, options) {
+    options = options || {};
+    const choices = options.choices || 3;
+    const items = [];
+    for (let i = 0; i < choices; i++) {
+        items.push(radio(name, i, 'choice' + i, 'Choice ' + i, options.value === 'choice' + i));
+    }
+    const other = options.otherHtml || ('<input data-choice-fields-other="data-choice-fields-other" id="id_' + name +
+        '_1" name="' + name + '_1" type="text" />');
+    items.push(radio(name, choices, '__other__', '', options.value === '__other__', other));
+    return '<div class="choice_with_other_wrapper" style="display: table-row;"><ul id="id_' + name + '_0">' +
+        items.join('\n') + '</ul></div>';
+}
+
+// Markup of ChoiceWithOtherWidget(select_layout=True).
+function selectWidgetHtml(name, options) {
+    options = options || {};
+    const choices = options.choices || 3;
+    const items = [];
+    for (let i = 0; i < choices; i++) {
+        items.push('<option value="choice' + i + '"' + (options.value === 'choice' + i ? ' selected="selected"' : '') +
+            '>Choice ' + i + '</option>');
+    }
+    items.push('<option value="__other__">Other</option>');
+    const other = options.otherHtml || ('<input data-choice-fields-other="data-choice-fields-other" id="id_' + name +
+        '_1" name="' + name + '_1" type="text" />');
+    return '<div class="choice_with_other_wrapper" style="display: table-row;"><select data-choice-fields="' + name +
+        '_0" id="id_' + name + '_0" name="' + name + '_0">\n' + items.join('\n') +
+        '\n</select><div class="other-field">' + other + '</div></div>';
+}
+
+// Markup of ChoiceWithOtherWidget(virtualized=True) with `rows` rendered:
+// the first ones, or the ones from the selected choice on when it's further
+// down.
+function virtualHtml(name, options) {
+    options = options || {};
+    const choices = options.choices || 100;
+    const rows = options.rows || 10;
+    const data = [];
+    for (let i = 0; i < choices; i++) {
+        data.push(['choice' + i, 'Choice ' + i]);
+    }
+    let start = data.findIndex(function (row) {
+        return row[0] === options.value;
+    });
+    start = start < rows ? 0 : Math.min(start, choices - rows);
+    const shown = data.slice(start, start + rows);
+    const items = shown.map(function (row) {
+        return '<li><label><input type="radio" value="' + row[0] + '" data-virtual-choice' +
+            (row[0] === options.value ? ' checked="checked"' : '') + ' /> ' + row[1] + '</label></li>';
+    });
+    return '<div class="choice_with_other_wrapper" style="display: table-row;"><div class="choice_with_other_virtual" id="id_' +
+        name + '_0" data-row-height="24"><input name="' + name + '_0" type="hidden" value="' + (options.value || '') +
+        '" /><input type="search" aria-label="Filter choices" data-virtual-filter /><div data-virtual-viewport' +
+        (start ? ' data-scroll-top="' + start * 24 + '"' : '') + ' style="height: ' + rows * 24 +
+        'px; overflow-y: auto;"><ul style="padding-top: ' + start * 24 + 'px; padding-bottom: ' +
+        (choices - start - shown.length) * 24 + 'px;">' + items.join('') + '</ul></div><label><input type="radio" value="__other__" ' +
+        'data-virtual-other /> <div class="other-field"><input data-choice-fields-other="data-choice-fields-other" id="id_' +
+        name + '_1" name="' + name + '_1" type="text" /></div></label><script type="application/json" ' +
+        'data-virtual-choices>' + JSON.stringify(data) + '</script></div></div>';
+}
+
+function deferredSelectHtml(name, url) {
+    return '<select data-choice-fields-other="data-choice-fields-other" data-deferred-choices-url="' + url +
+        '" id="id_' + name + '_1" name="' + name + '_1">\n<option value="">---------</option>\n</select>';
+}
+
+// Records the requests of the script, to be answered with respond().
+function installFakeXHR(window) {
+    const requests = [];
+
+    function FakeXMLHttpRequest() {
+        this.headers = {};
+        requests.push(this);
+    }
+    FakeXMLHttpRequest.prototype.open = function (method, url) {
+        this.method = method;
+        this.url = url;
+    };
+    FakeXMLHttpRequest.prototype.setRequestHeader = function (name, value) {
+        this.headers[name] = value;
+    };
+    FakeXMLHttpRequest.prototype.send = function () {
+        this.sent = true;
+    };
+    FakeXMLHttpRequest.prototype.respond = function (status, data) {
+        this.status = status;
+        this.responseText = JSON.stringify(data);
+        this.onload();
+    };
+    window.XMLHttpRequest = FakeXMLHttpRequest;
+    return requests;
+}
+
+function createWindow(body) {
+    const dom = new JSDOM('<!DOCTYPE html><html><body><form>' + (body || '') + '</form></body></html>',
+                          {runScripts: 'outside-only'});
+    return dom.window;
+}
+
+function loadScript(window) {
+    window.eval(SCRIPT);
+}
+
+module.exports = {
+    createWindow: createWindow,
+    deferredSelectHtml: deferredSelectHtml,
+    installFakeXHR: installFakeXHR,
+    loadScript: loadScript,
+    selectWidgetHtml: selectWidgetHtml,
+    virtualHtml: virtualHtml,
+    widgetHtml: widgetHtml,
+};
@@ -0,0 +1,244 @@
+'use strict';
+
+// Headless tests of dj_waff/static/dj_waff/choice_with_other.js, run with
+// `npm test` in this directory.
+
+const test = require('node:test');
+const assert = require('node:assert');
+
+const {
+    createWindow, deferredSelectHtml, installFakeXHR, loadScript, selectWidgetHtml, virtualHtml, widgetHtml,
+} = require('./fixtures');
+
+function click(window, element) {
+    element.dispatchEvent(new window.MouseEvent('click', {bubbles: true}));
+}
+
+function change(window, element) {
+    element.dispatchEvent(new window.Event('change', {bubbles: true}));
+}
+
+test('clicking the other field checks the other choice', function () {
+    const window = createWindow(widgetHtml('kind', {value: 'choice1'}) + widgetHtml('size', {value: 'choice0'}));
+    loadScript(window);
+    const document = window.document;
+    click(window, document.getElementById('id_kind_1'));
+    assert.strictEqual(document.getElementById('id_kind_0_3').checked, true);
+    assert.strictEqual(document.getElementById('id_kind_0_1').checked, false);
+    assert.strictEqual(document.getElementById('id_size_0_0').checked, true);
+});
+
+test('does not need jQuery', function () {
+    const window = createWindow(widgetHtml('kind'));
+    assert.strictEqual(window.jQuery, undefined);
+    loadScript(window);
+    click(window, window.document.getElementById('id_kind_1'));
+    assert.strictEqual(window.document.getElementById('id_kind_0_3').checked, true);
+});
+
+test('one listener per event type, whatever the number of widgets', function () {
+    const widgets = [];
+    for (let i = 0; i < 50; i++) {
+        widgets.push(widgetHtml('field' + i));
+    }
+    const window = createWindow(widgets.join(''));
+    const types = [];
+    const addEventListener = window.document.addEventListener;
+    window.document.addEventListener = function (type) {
+        types.push(type);
+        return addEventListener.apply(this, arguments);
+    };
+    window.Element.prototype.addEventListener = function () {
+        throw new Error('listeners must be delegated to the document');
+    };
+    loadScript(window);
+    loadScript(window);
+    // Virtualized lists are scrolled to their selected choice once loaded.
+    const delegated = types.filter(function (type) {
+        return type !== 'DOMContentLoaded';
+    });
+    assert.deepStrictEqual(delegated.sort(), ['change', 'click', 'focusin', 'input', 'mousedown', 'scroll']);
+});
+
+test('clicks outside the widgets are ignored', function () {
+    const window = createWindow(widgetHtml('kind', {value: 'choice1'}) + '<input id="unrelated" />');
+    loadScript(window);
+    click(window, window.document.getElementById('unrelated'));
+    click(window, window.document.getElementById('id_kind_0_2'));
+    assert.strictEqual(window.document.getElementById('id_kind_0_3').checked, false);
+});
+
+test('deferred choices are loaded page by page', function () {
+    const window = createWindow(widgetHtml('group', {otherHtml: deferredSelectHtml('group', '/groups/')}));
+    const requests = installFakeXHR(window);
+    loadScript(window);
+    const document = window.document;
+    const select = document.getElementById('id_group_1');
+
+    select.dispatchEvent(new window.FocusEvent('focusin', {bubbles: true}));
+    select.dispatchEvent(new window.FocusEvent('focusin', {bubbles: true}));
+    assert.strictEqual(requests.length, 1);
+    assert.strictEqual(requests[0].url, '/groups/?page=1');
+    assert.strictEqual(requests[0].headers['X-Requested-With'], 'XMLHttpRequest');
+    requests[0].respond(200, {results: [{id: 1, text: 'admins'}, {id: 2, text: 'staff'}], more: true});
+    assert.deepStrictEqual(Array.prototype.map.call(select.options, function (option) {
+        return option.textContent;
+    }), ['---------', 'admins', 'staff', '…']);
+
+    select.value = '2';
+    change(window, select);
+    select.selectedIndex = 3;
+    change(window, select);
+    assert.strictEqual(select.value, '2');
+    assert.strictEqual(requests.length, 2);
+    assert.strictEqual(requests[1].url, '/groups/?page=2');
+    requests[1].respond(200, {results: [{id: 3, text: 'editors'}], more: false});
+    assert.strictEqual(select.options.length, 4);
+    assert.strictEqual(select.querySelector('[data-load-more]'), null);
+
+    select.dispatchEvent(new window.MouseEvent('mousedown', {bubbles: true}));
+    assert.strictEqual(requests.length, 2);
+});
+
+test('checking the other choice loads the deferred choices', function () {
+    const window = createWindow(widgetHtml('group', {otherHtml: deferredSelectHtml('group', '/groups/?q=a')}));
+    const requests = installFakeXHR(window);
+    loadScript(window);
+    const radio = window.document.getElementById('id_group_0_3');
+    change(window, window.document.getElementById('id_group_0_0'));
+    assert.strictEqual(requests.length, 0);
+    radio.checked = true;
+    change(window, radio);
+    assert.strictEqual(requests.length, 1);
+    assert.strictEqual(requests[0].url, '/groups/?q=a&page=1');
+});
+
+test('widgets added after the script are handled without initialization', function () {
+    const window = createWindow(widgetHtml('form-0-kind'));
+    loadScript(window);
+    const document = window.document;
+    const form = document.querySelector('form');
+    const row = document.createElement('div');
+    row.innerHTML = widgetHtml('form-1-kind', {value: 'choice0'});
+    form.appendChild(row);
+    click(window, document.getElementById('id_form-1-kind_1'));
+    assert.strictEqual(document.getElementById('id_form-1-kind_0_3').checked, true);
+    assert.strictEqual(document.getElementById('id_form-0-kind_0_3').checked, false);
+});
+
+test('widgets swapped in over AJAX get deferred choices', function () {
+    const window = createWindow('<div id="target"></div>');
+    const requests = installFakeXHR(window);
+    loadScript(window);
+    const document = window.document;
+    document.getElementById('target').innerHTML = widgetHtml(
+        'group', {otherHtml: deferredSelectHtml('group', '/groups/')});
+    const select = document.getElementById('id_group_1');
+    select.dispatchEvent(new window.MouseEvent('mousedown', {bubbles: true}));
+    assert.strictEqual(requests.length, 1);
+});
+
+function virtualValues(document) {
+    return Array.prototype.map.call(document.querySelectorAll('[data-virtual-choice]'), function (input) {
+        return input.value;
+    });
+}
+
+test('virtual lists render the rows scrolled into view', function () {
+    const window = createWindow(virtualHtml('kind', {choices: 1000, value: 'choice500'}));
+    window.requestAnimationFrame = function (callback) {
+        callback();
+    };
+    loadScript(window);
+    const document = window.document;
+    const viewport = document.querySelector('[data-virtual-viewport]');
+    // jsdom has no layout, scrollTop is always 0.
+    Object.defineProperty(viewport, 'scrollTop', {value: 500 * 24, writable: true});
+    viewport.dispatchEvent(new window.Event('scroll'));
+    const values = virtualValues(document);
+    assert.ok(values.length < 30);
+    assert.ok(values.indexOf('choice500') !== -1);
+    assert.strictEqual(document.querySelector('[data-virtual-choice][value="choice500"]').checked, true);
+    const list = viewport.querySelector('ul');
+    assert.strictEqual(list.style.paddingTop, values[0].slice(6) * 24 + 'px');
+});
+
+test('virtual lists are scrolled to the selected choice', function () {
+    const window = createWindow(virtualHtml('kind', {choices: 1000, value: 'choice500'}));
+    const document = window.document;
+    const viewport = document.querySelector('[data-virtual-viewport]');
+    Object.defineProperty(viewport, 'scrollTop', {value: 0, writable: true});
+    assert.strictEqual(document.querySelector('[data-virtual-choice][value="choice500"]').checked, true);
+    loadScript(window);
+    document.dispatchEvent(new window.Event('DOMContentLoaded'));
+    assert.strictEqual(viewport.scrollTop, 500 * 24);
+    assert.strictEqual(viewport.hasAttribute('data-scroll-top'), false);
+});
+
+test('virtual lists added later are scrolled to the selected choice on request', function () {
+    const window = createWindow('<div id="target"></div>');
+    loadScript(window);
+    const document = window.document;
+    const target = document.getElementById('target');
+    target.innerHTML = virtualHtml('kind', {choices: 1000, value: 'choice995'});
+    const viewport = document.querySelector('[data-virtual-viewport]');
+    Object.defineProperty(viewport, 'scrollTop', {value: 0, writable: true});
+    window.djWaffChoiceWithOther.scroll_virtual_lists(target);
+    assert.strictEqual(viewport.scrollTop, 990 * 24);
+    assert.strictEqual(document.querySelector('[data-virtual-choice][value="choice995"]').checked, true);
+});
+
+test('virtual lists are filtered on the labels', function () {
+    const window = createWindow(virtualHtml('kind', {choices: 1000}));
+    loadScript(window);
+    const document = window.document;
+    const filter = document.querySelector('[data-virtual-filter]');
+    filter.value = 'CHOICE 99';
+    filter.dispatchEvent(new window.Event('input', {bubbles: true}));
+    assert.deepStrictEqual(virtualValues(document).slice(0, 3), ['choice99', 'choice990', 'choice991']);
+    assert.strictEqual(virtualValues(document).length, 11);
+});
+
+test('virtual lists keep the value in the hidden input', function () {
+    const window = createWindow(virtualHtml('kind', {value: 'choice1'}));
+    loadScript(window);
+    const document = window.document;
+    const hidden = document.querySelector('input[name="kind_0"]');
+    const choice = document.querySelector('[data-virtual-choice][value="choice2"]');
+    choice.checked = true;
+    change(window, choice);
+    assert.strictEqual(hidden.value, 'choice2');
+    assert.strictEqual(document.querySelector('[data-virtual-choice][value="choice1"]').checked, false);
+
+    click(window, document.getElementById('id_kind_1'));
+    assert.strictEqual(document.querySelector('[data-virtual-other]').checked, true);
+    assert.strictEqual(hidden.value, '__other__');
+    assert.strictEqual(choice.checked, false);
+});
+
+test('clicking the other field selects the other option of the select layout', function () {
+    const window = createWindow(selectWidgetHtml('kind', {value: 'choice1'}));
+    loadScript(window);
+    const document = window.document;
+    const select = document.getElementById('id_kind_0');
+    let changes = 0;
+    select.addEventListener('change', function () {
+        changes++;
+    });
+    click(window, document.getElementById('id_kind_1'));
+    click(window, document.getElementById('id_kind_1'));
+    assert.strictEqual(select.value, '__other__');
+    assert.strictEqual(changes, 1);
+});
+
+test('selecting the other option loads the deferred choices', function () {
+    const window = createWindow(selectWidgetHtml('group', {otherHtml: deferredSelectHtml('group', '/groups/')}));
+    const requests = installFakeXHR(window);
+    loadScript(window);
+    const select = window.document.getElementById('id_group_0');
+    change(window, select);
+    assert.strictEqual(requests.length, 0);
+    select.value = '__other__';
+    change(window, select);
+    assert.strictEqual(requests.length, 1);
+});
@@ -0,0 +1,1049 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_choice_with_other
+----------------------
+
+Tests for `dj_waff.choice_with_other` module.
+"""
+
+import copy
+import json
+import sys
+import threading
+from unittest import skipIf, skipUnless
+
+import django
+from django import forms
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import caches
+from django.core.exceptions import MultipleObjectsReturned
+from django.db.models.signals import post_save
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import six, translation
+from django.utils.encoding import force_text
+from django.utils.functional import lazy
+
+from dj_waff.choice_with_other import (
+    ChoiceWithOtherField, ChoiceWithOtherRenderer, ChoiceWithOtherSelect, CompiledSelect, LazyChoices, OTHER_CHOICE,
+)
+from dj_waff.choice_with_other.caching import RenderCache, digest_cache
+from dj_waff.choice_with_other.choices import choices_version, freeze_choices, label_cache, resolve_labels
+from dj_waff.choice_with_other.formsets import BaseChoiceWithOtherFormSet
+from dj_waff.choice_with_other.fragments import FragmentCache, fragment_cache
+from dj_waff.choice_with_other.instrumentation import MemorySink, recording, sinks
+from dj_waff.choice_with_other.media import CachedMediaMixin, merge_media
+from dj_waff.choice_with_other.testing import ChoiceWithOtherAssertionsMixin, render_form
+
+from .urls import GroupChoicesView
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+try:
+    from debug_toolbar.toolbar import DebugToolbar
+except ImportError:
+    DebugToolbar = None
+
+CHOICES = [
+    ('choice1', 'choice1111'),
+    ('choice2', 'Label <b>&</b>'),
+    ('group', [('g1', 'Group 1'), ('choice2', 'Duplicate')]),
+    (3, 'Integer value'),
+    (OTHER_CHOICE, ''),
+]
+
+
+class TestChoiceWithOtherRendererCache(TestCase):
+
+    def setUp(self):
+        self.cache = FragmentCache(maxsize=2)
+
+    def get_renderer(self, value, name='field_0', attrs=None, choices=CHOICES):
+        renderer = ChoiceWithOtherRenderer(name, value, attrs or {'id': 'id_field_0'}, choices)
+        renderer.fragment_cache = self.cache
+        return renderer
+
+    def test_cached_render_matches_uncached_render(self):
+        for value in ('', 'choice1', 'choice2', 'g1', '3', OTHER_CHOICE, 'missing'):
+            renderer = self.get_renderer(value)
+            self.assertEqual(renderer.render(), renderer.render_uncached())
+
+    def test_compiled_once_per_attrs_and_choices(self):
+        self.get_renderer('choice1').render()
+        self.get_renderer('choice2', name='other_0', attrs={'id': 'id_other_0'}).render()
+        self.assertEqual(len(self.cache), 1)
+        self.get_renderer('choice1', attrs={'id': 'id_field_0', 'class': 'radio'}).render()
+        self.assertEqual(len(self.cache), 2)
+
+    def test_name_and_id_filled_per_render(self):
+        for name, id_ in (('other_0', 'id_other_0'), ('a"b_0', 'id_a"b_0'), ('form-1-field_0', '')):
+            renderer = self.get_renderer('choice2', name=name, attrs={'id': id_})
+            self.assertEqual(renderer.render(), renderer.render_uncached())
+
+    def test_lru_eviction(self):
+        for choices in (CHOICES[:1], CHOICES[:2], CHOICES[:3]):
+            self.get_renderer('', choices=choices).render()
+        self.assertEqual(len(self.cache), 2)
+
+    def test_choices_assigned_per_form_compiled_once(self):
+        renderer_class = type('Renderer', (ChoiceWithOtherRenderer,), {'fragment_cache': self.cache})
+
+        class PerInstanceForm(forms.Form):
+            kind = ChoiceWithOtherField(choices=[], other_form_field=forms.CharField())
+
+            def __init__(self, *args, **kwargs):
+                super(PerInstanceForm, self).__init__(*args, **kwargs)
+                self.fields['kind'].choices = [(i, 'Choice {}'.format(i)) for i in range(20)]
+                self.fields['kind'].widget.widgets[0].renderer = renderer_class
+
+        forms_ = [PerInstanceForm() for i in range(3)]
+        htmls = [force_text(form['kind']) for form in forms_]
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(len(set(htmls)), 1)
+        versions = set(choices_version(form.fields['kind'].widget.choices) for form in forms_)
+        self.assertEqual(len(versions), 1)
+        resolve_labels(forms_[0].fields['kind'].widget.choices)
+        label_cache_size = len(label_cache)
+        for form in forms_:
+            resolve_labels(form.fields['kind'].widget.choices)
+        self.assertEqual(len(label_cache), label_cache_size)
+
+    def test_render_without_cache(self):
+        renderer = self.get_renderer('choice2')
+        renderer.fragment_cache = None
+        self.assertEqual(renderer.render(), renderer.render_uncached())
+
+    def test_getitem_matches_iteration(self):
+        renderer = self.get_renderer('choice2')
+        inputs = [force_text(w) for w in renderer]
+        for idx in (0, 1, 3, -1, -5):
+            self.assertEqual(force_text(renderer[idx]), inputs[idx])
+        self.assertEqual([force_text(w) for w in renderer[1:3]], inputs[1:3])
+        with self.assertRaises(IndexError):
+            renderer[len(CHOICES)]
+
+
+class TestChoiceWithOtherWidgetIterRender(TestCase):
+
+    def setUp(self):
+        self.field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+        self.widget = self.field.widget
+
+    def test_iter_render_matches_render(self):
+        for value in (None, 'choice1', 'g1', 'free text', [OTHER_CHOICE, 'free text']):
+            self.assertEqual(
+                ''.join(self.widget.iter_render('field', value, {'id': 'id_field'})),
+                self.widget.render('field', value, {'id': 'id_field'}),
+            )
+
+    def test_iter_render_doesnt_compile(self):
+        html = self.widget.render('field', 'choice2', {'id': 'id_field'})
+        renderer = self.widget.widgets[0].renderer
+        cache = FragmentCache()
+        self.widget.widgets[0].renderer = type('IsolatedRenderer', (renderer,), {
+            'fragment_cache': cache,
+            'compile': None,
+        })
+        self.assertEqual(''.join(self.widget.iter_render('field', 'choice2', {'id': 'id_field'})), html)
+        self.assertEqual(len(cache), 0)
+
+    def test_iter_render_matches_render_in_every_layout(self):
+        layouts = (
+            ('virtualized', True),
+            ('select_layout', True),
+            ('template_name', 'dj_waff/choice_with_other/widget.html'),
+            ('render_cache', RenderCache()),
+        )
+        for attr, setting in layouts:
+            field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+            setattr(field.widget, attr, setting)
+            for value in (None, 'g1', 'free text'):
+                self.assertEqual(
+                    ''.join(field.widget.iter_render('field', value, {'id': 'id_field'})),
+                    field.widget.render('field', value, {'id': 'id_field'}),
+                    attr,
+                )
+
+    def test_iter_render_yields_one_choice_per_chunk(self):
+        chunks = list(self.widget.iter_render('field', 'choice1'))
+        self.assertTrue(all(chunk.count('<li>') <= 1 for chunk in chunks))
+        self.assertTrue(all(chunk.count('type="radio"') <= 1 for chunk in chunks))
+        self.assertIn('Group 1', ''.join(chunks))
+
+
+class TestChoiceWithOtherWidgetRender(TestCase):
+
+    def test_render_braces_in_labels(self):
+        field = ChoiceWithOtherField(
+            choices=[('a', '{other_form_field}'), ('b', '{0} {} {{x}} }{'), ('{c}', 'c')],
+            other_form_field=forms.CharField(),
+        )
+        html = field.widget.render('field', '{c}', {'id': 'id_field'})
+        self.assertIn('> {other_form_field}</label>', html)
+        self.assertIn('> {0} {} {{x}} }{</label>', html)
+        self.assertIn('checked="checked" data-choice-fields="field_0" id="id_field_0_2" name="field_0" '
+                      'type="radio" value="{c}"', html)
+        self.assertEqual(html.count('<div class="other-field"><input'), 1)
+
+    def test_render_other_value(self):
+        field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+        html = field.widget.render('field', 'free text', {'id': 'id_field'})
+        self.assertInHTML('<div class="other-field"><input data-choice-fields-other="data-choice-fields-other" '
+                          'id="id_field_1" name="field_1" type="text" value="free text" /></div>', html)
+        self.assertIn('checked="checked" data-choice-fields="field_0" id="id_field_0_4"', html)
+
+    def test_format_output(self):
+        field = ChoiceWithOtherField(choices=[('a', '{b}')], other_form_field=forms.CharField())
+        self.assertEqual(
+            field.widget.format_output(['<ul><li>{b}{other_form_field}</li></ul>', '<input />']),
+            '<div class="choice_with_other_wrapper" style="display: table-row;">'
+            '<ul><li>{b}<input /></li></ul></div>',
+        )
+
+
+class Jinja2Renderer(object):
+    def __init__(self):
+        from django.template.backends.jinja2 import Jinja2
+        self.engine = Jinja2({'APP_DIRS': True, 'DIRS': [], 'NAME': 'jinja2', 'OPTIONS': {}})
+
+    def render(self, template_name, context):
+        return self.engine.get_template(template_name).render(context)
+
+
+class TestChoiceWithOtherWidgetTemplate(TestCase):
+
+    def setUp(self):
+        self.field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField(),
+                                          template_name='dj_waff/choice_with_other/widget.html')
+
+    def assertTemplateMatchesCompiled(self, renderer=None):
+        widget = self.field.widget
+        for value in ('choice2', 'g1', 3, 'free <text>', None):
+            for attrs in ({'id': 'id_field'}, None):
+                html = widget.render('field', value, attrs, renderer=renderer)
+                self.assertEqual(html, ''.join(widget.iter_render('field', value, attrs)))
+
+    def test_django_template_matches_compiled(self):
+        self.assertTemplateMatchesCompiled()
+
+    @skipUnless(jinja2, 'Jinja2 is not installed')
+    def test_jinja2_template_matches_compiled(self):
+        self.assertTemplateMatchesCompiled(Jinja2Renderer())
+
+    def test_get_context(self):
+        context = self.field.widget.get_context('field', 'free text', {'id': 'id_field'})['widget']
+        self.assertIn('value="free text"', context['other'])
+        other = context['choices']['items'][-1]
+        self.assertTrue(other['is_other'])
+        self.assertIn(('checked', 'checked'), other['attrs'])
+        self.assertEqual(context['choices']['items'][2]['group']['id'], 'id_field_0_2')
+
+
+class TestChoiceWithOtherWidgetVirtualized(TestCase):
+
+    def setUp(self):
+        choices = CHOICES[:-1] + [('many{}'.format(i), 'Many {}'.format(i)) for i in range(100)]
+        self.field = ChoiceWithOtherField(choices=choices + [('script', '</script>')],
+                                          other_form_field=forms.CharField(), virtualized=True)
+
+    def get_payload(self, html):
+        start = html.index('data-virtual-choices>') + len('data-virtual-choices>')
+        return html[start:html.index('</script>', start)]
+
+    def test_hidden_input_keeps_field_name(self):
+        html = self.field.widget.render('field', 'g1', {'id': 'id_field'})
+        self.assertIn('<input name="field_0" type="hidden" value="g1" />', html)
+        self.assertIn('name="field_1"', html)
+        html = self.field.widget.render('field', 'free text', {'id': 'id_field'})
+        self.assertIn('<input name="field_0" type="hidden" value="{}" />'.format(OTHER_CHOICE), html)
+        self.assertIn('data-virtual-other checked="checked"', html)
+
+    def test_payload(self):
+        html = self.field.widget.render('field', None)
+        payload = self.get_payload(html)
+        self.assertNotIn('<', payload)
+        rows = json.loads(payload)
+        self.assertEqual(rows[:5], [['choice1', 'choice1111'], ['choice2', 'Label <b>&</b>'], ['group'],
+                                    ['g1', 'Group 1'], ['choice2', 'Duplicate']])
+        self.assertEqual(rows[-1], ['script', '</script>'])
+        self.assertEqual(len(rows), 107)
+
+    def test_only_first_rows_rendered(self):
+        self.field.widget.virtual_rows = 4
+        html = self.field.widget.render('field', None)
+        self.assertEqual(html.count('data-virtual-choice '), 3)
+        self.assertIn('<li class="optgroup">group</li>', html)
+        self.assertIn('padding-bottom: {}px'.format(103 * 24), html)
+
+    def test_selected_row_rendered(self):
+        rows = json.loads(self.get_payload(self.field.widget.render('field', None)))
+        start = rows.index(['many50', 'Many 50'])
+        html = self.field.widget.render('field', 'many50')
+        self.assertIn('value="many50" data-virtual-choice checked="checked"', html)
+        self.assertEqual(html.count('data-virtual-choice '), 10)
+        self.assertIn('data-virtual-viewport data-scroll-top="{}"'.format(start * 24), html)
+        self.assertIn('padding-top: {}px; padding-bottom: {}px;'.format(start * 24, (len(rows) - start - 10) * 24),
+                      html)
+
+    def test_selected_row_at_end_rendered(self):
+        html = self.field.widget.render('field', 'script')
+        self.assertIn('value="script" data-virtual-choice checked="checked"', html)
+        self.assertIn('value="many91"', html)
+        self.assertIn('data-scroll-top="{}"'.format(97 * 24), html)
+        self.assertIn('padding-bottom: 0px;', html)
+
+    def test_selected_row_in_first_rows(self):
+        html = self.field.widget.render('field', 'g1')
+        self.assertIn('value="g1" data-virtual-choice checked="checked"', html)
+        self.assertNotIn('data-scroll-top', html)
+        self.assertIn('padding-top: 0px;', html)
+
+    def test_post_data_unchanged(self):
+        class VirtualForm(forms.Form):
+            kind = self.field
+
+        for data, value in (({'kind_0': 'g1'}, ('g1', 'g1')),
+                            ({'kind_0': OTHER_CHOICE, 'kind_1': 'free'}, (OTHER_CHOICE, 'free'))):
+            form = VirtualForm(data)
+            self.assertTrue(form.is_valid(), form.errors)
+            self.assertEqual(form.cleaned_data['kind'], value)
+
+    def test_render_cache_key(self):
+        widget = self.field.widget
+        widget.render_cache = RenderCache()
+        key = widget.get_render_cache_key('field', 'g1')
+        widget.virtualized = False
+        self.assertNotEqual(key, widget.get_render_cache_key('field', 'g1'))
+
+
+class TestChoiceWithOtherWidgetSelect(TestCase):
+
+    def setUp(self):
+        self.field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField(), select_layout=True)
+        self.field.widget.select_class = type('Select', (ChoiceWithOtherSelect,), {'fragment_cache': FragmentCache()})
+
+    def test_markup(self):
+        html = self.field.widget.render('field', 'free <text>', {'id': 'id_field'})
+        self.assertTrue(html.startswith('<div class="choice_with_other_wrapper" style="display: table-row;">'
+                                        '<select data-choice-fields="field_0" id="id_field_0" name="field_0">\n'
+                                        '<option value="choice1">choice1111</option>\n'
+                                        '<option value="choice2">Label &lt;b&gt;&amp;&lt;/b&gt;</option>\n'
+                                        '<optgroup label="group">'))
+        self.assertIn('<option value="{}" selected="selected">Other</option>\n</select>'.format(OTHER_CHOICE), html)
+        self.assertTrue(html.endswith('</div></div>'))
+        self.assertInHTML('<div class="other-field"><input data-choice-fields-other="data-choice-fields-other" '
+                          'id="id_field_1" name="field_1" type="text" value="free &lt;text&gt;" /></div>', html)
+
+    def test_options_compiled_once(self):
+        widget = self.field.widget
+        for value in ('choice2', 'g1', 3, 'free text', None):
+            html = widget.render('field', value)
+            self.assertEqual(html.count('selected="selected"'), 1 if value else 0)
+        self.assertIn('<option value="3" selected="selected">', widget.render('field', 3))
+        self.assertEqual(len(widget.select_class.fragment_cache), 1)
+        self.field.choices = [('new', 'New')]
+        self.assertIn('<option value="new">New</option>', widget.render('field', None))
+        self.assertEqual(len(widget.select_class.fragment_cache), 2)
+
+    def test_post_data_unchanged(self):
+        class SelectForm(forms.Form):
+            kind = self.field
+
+        form = SelectForm({'kind_0': OTHER_CHOICE, 'kind_1': 'free'})
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data['kind'], (OTHER_CHOICE, 'free'))
+
+    def test_render_cache_key(self):
+        widget = self.field.widget
+        widget.render_cache = RenderCache()
+        key = widget.get_render_cache_key('field', 'g1')
+        widget.select_layout = False
+        self.assertNotEqual(key, widget.get_render_cache_key('field', 'g1'))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TestChoiceWithOtherRenderCache(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        self.render_cache = RenderCache()
+
+    def get_field(self, other_form_field=None, **kwargs):
+        return ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=other_form_field or forms.CharField(),
+                                    render_cache=self.render_cache, **kwargs)
+
+    def test_hits_and_misses(self):
+        field = self.get_field()
+        html = field.widget.render('field', 'choice2', {'id': 'id_field'})
+        self.assertEqual(copy.deepcopy(field).widget.render('field', 'choice2', {'id': 'id_field'}), html)
+        self.assertEqual((self.render_cache.hits, self.render_cache.misses), (1, 1))
+        self.assertEqual(html, field.widget.render_uncached('field', 'choice2', {'id': 'id_field'}))
+
+    def test_key_changes(self):
+        field = self.get_field()
+        field.widget.render('field', 'choice2')
+        field.widget.render('field', 'choice1')
+        field.widget.render('other', 'choice1')
+        field.widget.render('other', 'choice1', {'id': 'id_other'})
+        with translation.override('fr'):
+            field.widget.render('other', 'choice1', {'id': 'id_other'})
+        field.choices = [('new', 'New')]
+        html = field.widget.render('other', 'choice1', {'id': 'id_other'})
+        self.assertEqual(self.render_cache.misses, 6)
+        self.assertEqual(self.render_cache.hits, 0)
+        self.assertIn('value="new"', html)
+
+    def test_lazy_choices_version(self):
+        field = ChoiceWithOtherField(choices=lambda: [(g.name, g.name) for g in Group.objects.all()],
+                                     other_form_field=forms.CharField(), render_cache=self.render_cache)
+        Group.objects.create(name='admins')
+        self.assertIn('value="admins"', field.widget.render('field', 'admins'))
+        Group.objects.create(name='staff')
+        field.choices.invalidate()
+        self.assertIn('value="staff"', field.widget.render('field', 'admins'))
+        self.assertEqual(self.render_cache.misses, 2)
+
+    def test_timeout(self):
+        self.render_cache.timeout = 0
+        field = self.get_field()
+        field.widget.render('field', 'choice2')
+        field.widget.render('field', 'choice2')
+        self.assertEqual((self.render_cache.hits, self.render_cache.misses), (0, 2))
+
+    def test_least_recently_used_evicted(self):
+        self.render_cache.max_entries = 2
+        field = self.get_field()
+        for value in ('choice1', 'choice2', 'choice1', 'g1'):
+            field.widget.render('field', value)
+        self.assertEqual((self.render_cache.hits, self.render_cache.misses), (1, 3))
+        field.widget.render('field', 'choice1')
+        field.widget.render('field', 'choice2')
+        self.assertEqual((self.render_cache.hits, self.render_cache.misses), (2, 4))
+        self.assertEqual(len(self.render_cache._keys), 2)
+
+    def test_bypassed_for_query_dependent_other_widget(self):
+        field = self.get_field(forms.ModelChoiceField(queryset=Group.objects.all()))
+        field.widget.render('field', 'choice2')
+        field.widget.render('field', 'choice2')
+        self.assertEqual((self.render_cache.bypasses, self.render_cache.misses), (2, 0))
+        field.widget.widgets[1].render_cacheable = True
+        field.widget.render('field', 'choice2')
+        self.assertEqual(self.render_cache.misses, 1)
+
+    def test_choices_digested_once(self):
+        digest_cache.clear()
+        field = self.get_field(forms.ChoiceField(choices=[('a', 'A')]))
+        for i in range(3):
+            form_field = copy.deepcopy(field)
+            form_field.choices = [('new', 'New')]
+            form_field.widget.render('field', 'new')
+        # One digest of the choices and one of the choices of the "other" select.
+        self.assertEqual(len(digest_cache), 2)
+        self.assertEqual(self.render_cache.hits, 2)
+
+    def test_select_other_widget_choices_in_key(self):
+        field = self.get_field(forms.ChoiceField(choices=[('a', 'A')]))
+        field.widget.render('field', 'choice2')
+        field.widget.widgets[1].choices = [('b', 'B')]
+        self.assertIn('value="b"', field.widget.render('field', 'choice2'))
+        self.assertEqual(self.render_cache.misses, 2)
+
+
+class TestChoiceWithOtherChoiceIndex(TestCase):
+
+    def setUp(self):
+        self.field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+
+    def test_decompress(self):
+        widget = self.field.widget
+        self.assertEqual(widget.decompress(None), ['', ''])
+        self.assertEqual(widget.decompress('choice1'), ['choice1', ''])
+        self.assertEqual(widget.decompress(3), [3, ''])
+        self.assertEqual(widget.decompress('free text'), [OTHER_CHOICE, 'free text'])
+        self.assertEqual(widget.decompress(['unhashable']), [OTHER_CHOICE, ['unhashable']])
+
+    def test_decompress_grouped_choices(self):
+        self.assertEqual(self.field.widget.decompress('g1'), ['g1', ''])
+        self.assertEqual(self.field.widget.decompress('group'), [OTHER_CHOICE, 'group'])
+
+    def test_clean(self):
+        self.assertEqual(self.field.clean(['g1', '']), ('g1', 'g1'))
+        self.assertEqual(self.field.clean(['3', '']), ('3', '3'))
+        self.assertEqual(self.field.clean([OTHER_CHOICE, 'free text']), (OTHER_CHOICE, 'free text'))
+        with self.assertRaises(forms.ValidationError):
+            self.field.clean(['group', ''])
+
+    def test_index_rebuilt_when_choices_change(self):
+        self.field.choices = [('new', 'New')]
+        self.assertEqual(self.field.choices, [('new', 'New'), (OTHER_CHOICE, '')])
+        self.assertEqual(self.field.widget.decompress('new'), ['new', ''])
+        self.assertEqual(self.field.widget.decompress('choice1'), [OTHER_CHOICE, 'choice1'])
+        self.assertEqual(self.field.clean(['new', '']), ('new', 'new'))
+        with self.assertRaises(forms.ValidationError):
+            self.field.clean(['choice1', ''])
+        self.assertIn('value="new"', self.field.widget.render('field', 'new'))
+
+    def test_choices_change_on_form_copy(self):
+        field = copy.deepcopy(self.field)
+        field.choices = [('new', 'New')]
+        self.assertIn('value="new"', field.widget.render('field', 'new'))
+        self.assertNotIn('type="radio" value="new"', self.field.widget.render('field', 'new'))
+
+
+class TestChoiceWithOtherDeepCopy(TestCase):
+
+    def setUp(self):
+        self.field = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+
+    def test_copy_shares_choices_and_index(self):
+        self.field.fields[0].choice_index, self.field.widget.choice_index
+        field = copy.deepcopy(self.field)
+        self.assertIsNot(field.choices, self.field.choices)
+        self.assertEqual(field.choices, self.field.choices)
+        self.assertEqual(choices_version(field.choices), choices_version(self.field.choices))
+        self.assertIs(field.fields[0].choices, field.widget.widgets[0].choices)
+        self.assertIs(field.fields[0].choice_index, self.field.fields[0].choice_index)
+        self.assertIs(field.widget.choice_index, self.field.widget.choice_index)
+
+    def test_copy_shares_subwidgets_with_subfields(self):
+        field = copy.deepcopy(self.field)
+        self.assertIs(field.fields[0].widget, field.widget.widgets[0])
+        self.assertIs(field.fields[1].widget, field.widget.widgets[1])
+        self.assertIsNot(field.widget.widgets[0], self.field.widget.widgets[0])
+
+    def test_copy_attrs_are_independent(self):
+        field = copy.deepcopy(self.field)
+        field.widget.attrs['class'] = 'copy'
+        field.widget.widgets[1].attrs['class'] = 'copy'
+        self.assertNotIn('class', self.field.widget.attrs)
+        self.assertNotIn('class', self.field.widget.widgets[1].attrs)
+
+    def test_grouped_choices_are_frozen(self):
+        self.assertEqual(self.field.choices[2], ('group', (('g1', 'Group 1'), ('choice2', 'Duplicate'))))
+
+    def test_choices_stay_a_list(self):
+        self.assertIsInstance(self.field.choices, list)
+        self.assertIsInstance(self.field.widget.choices, list)
+
+    def test_mutating_copy_choices(self):
+        field = copy.deepcopy(self.field)
+        version = choices_version(field.fields[0].choices)
+        field.fields[0].choices.append(('new', 'New'))
+        self.assertNotEqual(choices_version(field.fields[0].choices), version)
+        self.assertEqual(choices_version(self.field.fields[0].choices), version)
+        self.assertEqual(field.fields[0].clean('new'), 'new')
+        with self.assertRaises(forms.ValidationError):
+            self.field.fields[0].clean('new')
+
+
+class TestChoiceWithOtherLabels(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def label(text):
+            self.calls.append((text, translation.get_language()))
+            return '{} ({})'.format(text, translation.get_language())
+
+        self.field = ChoiceWithOtherField(choices=[('a', lazy(label, six.text_type)('A <1>'))],
+                                          other_form_field=forms.CharField())
+
+    def test_labels_resolved_once_per_language(self):
+        choices = self.field.widget.widgets[0].choices
+        for language in ('en', 'fr', 'en', 'fr'):
+            with translation.override(language):
+                resolved = resolve_labels(choices)
+                self.assertEqual(resolved[0], ('a', 'A &lt;1&gt; ({})'.format(language)))
+        self.assertEqual(self.calls, [('A <1>', 'en'), ('A <1>', 'fr')])
+
+    def test_compiled_render_resolves_labels_once_per_language(self):
+        for language in ('en', 'fr', 'en', 'fr'):
+            with translation.override(language):
+                copy.deepcopy(self.field).widget.render('field', 'a')
+        self.assertEqual(len(self.calls), 2)
+
+    def test_choices_version_shared_by_copies(self):
+        self.assertEqual(choices_version(copy.deepcopy(self.field).widget.widgets[0].choices),
+                         choices_version(self.field.widget.widgets[0].choices))
+        version = choices_version(self.field.choices)
+        self.assertIsNotNone(version)
+        self.field.choices = [('b', 'B')]
+        self.assertNotEqual(choices_version(self.field.choices), version)
+
+    def test_equal_choices_frozen_once(self):
+        label = self.field.choices[0][1]
+
+        def version(choices):
+            return choices_version(freeze_choices(choices))
+        self.assertEqual(version([('a', 'A'), ('g', [('b', 'B')])]), version([('a', 'A'), ('g', (('b', 'B'),))]))
+        self.assertNotEqual(version([(1, 'A')]), version([(True, 'A')]))
+        self.assertEqual(version([('a', label)]), version([('a', label)]))
+        other_label = lazy(lambda: label, six.text_type)()
+        self.assertNotEqual(version([('a', label)]), version([('a', other_label)]))
+
+
+class TestChoiceWithOtherLazyChoices(TestCase):
+
+    def setUp(self):
+        self.calls = 0
+
+    def get_choices(self):
+        self.calls += 1
+        return [('a', 'A'), ('b', 'B')]
+
+    def get_form_class(self, choices, **kwargs):
+        class LazyForm(forms.Form):
+            field = ChoiceWithOtherField(choices=choices, other_form_field=forms.CharField(), **kwargs)
+        return LazyForm
+
+    def test_callable_evaluated_on_first_use_and_shared_by_forms(self):
+        form_class = self.get_form_class(self.get_choices)
+        self.assertEqual(self.calls, 0)
+        for _ in range(3):
+            form = form_class(data={'field_0': 'b', 'field_1': ''})
+            self.assertIn('value="a"', str(form['field']))
+            self.assertTrue(form.is_valid())
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(form.cleaned_data['field'], ('b', 'b'))
+
+    def test_ttl(self):
+        form_class = self.get_form_class(self.get_choices, choices_ttl=0)
+        str(form_class()['field'])
+        str(form_class()['field'])
+        self.assertGreater(self.calls, 1)
+
+    def test_invalidate(self):
+        form_class = self.get_form_class(self.get_choices)
+        str(form_class()['field'])
+        form_class.base_fields['field'].choices.invalidate()
+        str(form_class()['field'])
+        self.assertEqual(self.calls, 2)
+
+    @skipUnless(hasattr(sys, 'setswitchinterval'), 'sys.setswitchinterval() needs Python 3')
+    def test_invalidate_while_resolving(self):
+        choices = LazyChoices(self.get_choices)
+        errors = []
+        done = threading.Event()
+
+        def invalidate():
+            while not done.is_set():
+                choices.invalidate()
+
+        def read():
+            try:
+                for i in range(5000):
+                    self.assertEqual(len(list(choices)), 2)
+                    self.assertEqual(choices.derived('len', len), 2)
+            except Exception as e:
+                errors.append(e)
+
+        # Switching threads as often as possible makes an invalidate()
+        # between the checks and the return of resolve() likely.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        invalidator = threading.Thread(target=invalidate)
+        readers = [threading.Thread(target=read) for i in range(3)]
+        try:
+            invalidator.start()
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+        finally:
+            done.set()
+            invalidator.join()
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    def test_first_is_preselected(self):
+        form_class = self.get_form_class(self.get_choices, first_is_preselected=True)
+        self.assertEqual(self.calls, 0)
+        self.assertIn('checked="checked" data-choice-fields="field_0" id="id_field_0_0"', str(form_class()['field']))
+
+    def test_queryset_invalidated_on_post_save(self):
+        choices = LazyChoices(Group.objects.order_by('name'))
+        choices.invalidate_on(post_save, sender=Group)
+        self.addCleanup(post_save.disconnect, choices.invalidate, sender=Group)
+        form_class = self.get_form_class(choices)
+        Group.objects.create(name='first')
+        with self.assertNumQueries(1):
+            str(form_class()['field'])
+            str(form_class()['field'])
+        group = Group.objects.create(name='second')
+        with self.assertNumQueries(1):
+            html = str(form_class()['field'])
+        self.assertIn('value="{}" /> second'.format(group.pk), html)
+        form = form_class(data={'field_0': str(group.pk), 'field_1': ''})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['field'], (str(group.pk), str(group.pk)))
+
+
+@override_settings(ROOT_URLCONF='tests.urls')
+class TestChoiceWithOtherDeferredOther(TestCase):
+
+    def setUp(self):
+        self.groups = [Group.objects.create(name='group{}'.format(i)) for i in range(5)]
+        self.field = ChoiceWithOtherField(
+            choices=[('a', 'A')],
+            other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()),
+            other_choices_url='group-choices',
+        )
+
+    def test_render_only_selected_other_choice(self):
+        group = self.groups[3]
+        with self.assertNumQueries(1):
+            html = self.field.widget.render('field', [OTHER_CHOICE, str(group.pk)], {'id': 'id_field'})
+        self.assertIn('<select data-choice-fields-other="data-choice-fields-other" '
+                      'data-deferred-choices-url="/groups/" id="id_field_1" name="field_1">\n'
+                      '<option value="">---------</option>\n'
+                      '<option value="{}" selected="selected">group3</option>\n'
+                      '</select>'.format(group.pk), html)
+
+    def test_render_without_other_value(self):
+        with self.assertNumQueries(0):
+            html = self.field.widget.render('field', 'a')
+        self.assertEqual(html.count('<option'), 1)
+
+    def test_clean(self):
+        group = self.groups[0]
+        self.assertEqual(self.field.clean([OTHER_CHOICE, str(group.pk)]), (OTHER_CHOICE, group))
+
+    def test_other_choices_view(self):
+        view = GroupChoicesView.as_view(paginate_by=2)
+        response = view(RequestFactory().get('/groups/', {'page': 2}))
+        self.assertEqual(json.loads(response.content.decode('utf-8')), {
+            'results': [{'id': str(group.pk), 'text': group.name} for group in self.groups[2:4]],
+            'more': True,
+        })
+        response = view(RequestFactory().get('/groups/', {'page': 3}))
+        self.assertFalse(json.loads(response.content.decode('utf-8'))['more'])
+        self.assertEqual(view(RequestFactory().get('/groups/', {'page': 'x'})).status_code, 400)
+
+
+class GroupForm(forms.Form):
+    group = ChoiceWithOtherField(
+        choices=[('a', 'A')],
+        other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()),
+    )
+
+
+class TestChoiceWithOtherFormSet(TestCase):
+
+    def setUp(self):
+        self.groups = [Group.objects.create(name='group{}'.format(i)) for i in range(5)]
+
+    def get_formset(self, values, formset=BaseChoiceWithOtherFormSet, form=GroupForm, **kwargs):
+        data = {'form-TOTAL_FORMS': str(len(values)), 'form-INITIAL_FORMS': '0'}
+        for i, value in enumerate(values):
+            data['form-{}-group_0'.format(i)] = OTHER_CHOICE if value != 'a' else 'a'
+            data['form-{}-group_1'.format(i)] = value if value != 'a' else ''
+        return forms.formset_factory(form, formset=formset, **kwargs)(data)
+
+    def test_one_query_for_all_rows(self):
+        values = [str(group.pk) for group in self.groups] + ['a']
+        formset = self.get_formset(values)
+        with self.assertNumQueries(1):
+            self.assertTrue(formset.is_valid())
+        self.assertEqual([form.cleaned_data['group'][1] for form in formset.forms], self.groups + ['a'])
+
+    def test_chunks(self):
+        formset = self.get_formset([str(group.pk) for group in self.groups])
+        formset.other_values_chunk_size = 2
+        with self.assertNumQueries(3):
+            self.assertTrue(formset.is_valid())
+
+    def test_same_errors_as_per_row_clean(self):
+        values = ['999', 'abc', str(self.groups[0].pk)]
+        formset = self.get_formset(values)
+        per_row = self.get_formset(values, formset=forms.BaseFormSet)
+        with self.assertNumQueries(1):
+            self.assertFalse(formset.is_valid())
+        self.assertFalse(per_row.is_valid())
+        self.assertEqual(formset.errors, per_row.errors)
+        self.assertTrue(formset.errors[0])
+        self.assertTrue(formset.errors[1])
+        self.assertFalse(formset.errors[2])
+
+    def test_shared_other_field_not_modified(self):
+        patched = []
+
+        class RecordingChoiceField(forms.ModelChoiceField):
+            def validate(self, value):
+                patched.append('to_python' in vars(self))
+                super(RecordingChoiceField, self).validate(value)
+
+        class RecordingForm(forms.Form):
+            group = ChoiceWithOtherField(choices=[('a', 'A')],
+                                         other_form_field=RecordingChoiceField(queryset=Group.objects.all()))
+
+        formset = self.get_formset([str(group.pk) for group in self.groups], form=RecordingForm)
+        self.assertTrue(formset.is_valid())
+        self.assertEqual(patched, [False] * len(self.groups))
+
+    def test_ambiguous_to_field_name_raises(self):
+        permission = Permission.objects.get(codename='add_group')
+        Permission.objects.create(codename='add_group', name='Add group',
+                                  content_type=ContentType.objects.get_for_model(Permission))
+
+        class PermissionForm(forms.Form):
+            group = ChoiceWithOtherField(choices=[('a', 'A')], other_form_field=forms.ModelChoiceField(
+                queryset=Permission.objects.all(), to_field_name='codename'))
+
+        for formset_class in (BaseChoiceWithOtherFormSet, forms.BaseFormSet):
+            formset = self.get_formset([permission.codename], formset=formset_class, form=PermissionForm)
+            with self.assertRaises(MultipleObjectsReturned):
+                formset.is_valid()
+
+    def test_other_choices_evaluated_once(self):
+        formset = forms.formset_factory(GroupForm, formset=BaseChoiceWithOtherFormSet, extra=3)()
+        with self.assertNumQueries(1):
+            html = formset.as_p()
+        self.assertEqual(html.count('<option value="{}">group0</option>'.format(self.groups[0].pk)), 3)
+
+    def test_other_options_cached_per_formset(self):
+        formset_class = forms.formset_factory(GroupForm, formset=BaseChoiceWithOtherFormSet, extra=3)
+        fragment_cache_size = len(fragment_cache)
+        for i in range(3):
+            formset = formset_class()
+            formset.as_p()
+            self.assertEqual(len(formset.other_choices_cache), 1)
+        self.assertEqual(len(fragment_cache), fragment_cache_size)
+
+    def test_other_widget_attrs_not_shared(self):
+        formset = forms.formset_factory(GroupForm, formset=BaseChoiceWithOtherFormSet, extra=2)()
+        first, second = [form.fields['group'] for form in formset.forms]
+        self.assertIsNot(first.widget.widgets[1].attrs, second.widget.widgets[1].attrs)
+        self.assertIsNot(first.widget.widgets[1].attrs, first.fields[1].widget.attrs)
+        self.assertEqual(first.widget.widgets[1].attrs, first.fields[1].widget.attrs)
+
+    def test_same_markup_as_base_formset(self):
+        initial = [{'group': 'a'}, {'group': self.groups[1]}]
+        formset = forms.formset_factory(GroupForm, formset=BaseChoiceWithOtherFormSet)(initial=initial)
+        base_formset = forms.formset_factory(GroupForm)(initial=initial)
+        if django.VERSION < (1, 11):
+            self.assertEqual(formset.as_p(), base_formset.as_p())
+        else:
+            # Select renders a template since Django 1.11, with another
+            # order of attributes and other line breaks.
+            self.assertHTMLEqual(formset.as_p(), base_formset.as_p())
+
+
+class TestCompiledSelect(TestCase):
+
+    def test_markup(self):
+        choices = [('', '---'), (1, 'One & <b>'), ('g', [('2', 'Two')])]
+        compiled = CompiledSelect(attrs={'class': 'x'}, choices=choices)
+        compiled.fragment_cache = FragmentCache()
+        self.assertEqual(compiled.render('field', '2', {'id': 'id_field'}),
+                         '<select class="x" id="id_field" name="field">\n'
+                         '<option value="">---</option>\n'
+                         '<option value="1">One &amp; &lt;b&gt;</option>\n'
+                         '<optgroup label="g">\n'
+                         '<option value="2" selected="selected">Two</option>\n'
+                         '</optgroup>\n'
+                         '</select>')
+
+    @skipIf(django.VERSION >= (1, 11), 'Select renders templates since Django 1.11')
+    def test_same_markup_as_select(self):
+        choices = [('', '---'), (1, 'One & <b>'), ('g', [('2', 'Two'), (None, 'None')]), ('2', 'Duplicate')]
+        compiled = CompiledSelect(attrs={'class': 'x'}, choices=choices)
+        compiled.fragment_cache = FragmentCache()
+        select = forms.Select(attrs={'class': 'x'}, choices=choices)
+        for value in (None, '', 1, '1', '2', 'missing'):
+            self.assertEqual(compiled.render('field', value, {'id': 'id_field'}),
+                             select.render('field', value, {'id': 'id_field'}))
+        self.assertEqual(len(compiled.fragment_cache), 1)
+        self.assertEqual(CompiledSelect().render('field', ''), forms.Select().render('field', ''))
+
+
+class TestCachedMedia(TestCase):
+
+    def get_form_class(self):
+        class MediaForm(CachedMediaMixin, forms.Form):
+            kind = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+            size = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+
+            def __init__(self, *args, **kwargs):
+                extra_widget = kwargs.pop('extra_widget', None)
+                super(MediaForm, self).__init__(*args, **kwargs)
+                if extra_widget is not None:
+                    self.fields['extra'] = forms.CharField(widget=extra_widget)
+
+        return MediaForm
+
+    def test_media_computed_once_per_form_class(self):
+        form_class = self.get_form_class()
+        media = form_class().media
+        self.assertIs(form_class().media, media)
+        self.assertEqual(media._js, ['dj_waff/choice_with_other.js'])
+        self.assertIsNot(self.get_form_class()().media, media)
+
+    def test_fields_added_in_init(self):
+        class ExtraWidget(forms.TextInput):
+            class Media:
+                js = ('extra.js',)
+
+        form_class = self.get_form_class()
+        self.assertEqual(form_class(extra_widget=ExtraWidget()).media._js, ['dj_waff/choice_with_other.js', 'extra.js'])
+        self.assertEqual(form_class().media._js, ['dj_waff/choice_with_other.js'])
+
+    def test_merge_media_same_as_sum(self):
+        media_list = [
+            forms.Media(js=['a.js', 'b.js'], css={'all': ['a.css']}),
+            forms.Media(js=['b.js', 'c.js'], css={'print': ['p.css'], 'all': ['a.css', 'b.css']}),
+            forms.Media(),
+            forms.Media(js=['a.js', 'd.js']),
+        ]
+        merged = merge_media(media_list)
+        added = sum(media_list, forms.Media())
+        self.assertEqual(merged._js, added._js)
+        self.assertEqual(merged._css, added._css)
+        self.assertEqual(str(merged), str(added))
+
+
+class TestInstrumentation(TestCase):
+
+    def get_form_class(self, render_cache=None):
+        class InstrumentedForm(forms.Form):
+            kind = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField(),
+                                        render_cache=render_cache)
+            group = ChoiceWithOtherField(choices=CHOICES[:-1],
+                                         other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()))
+
+        return InstrumentedForm
+
+    def test_disabled_without_sinks(self):
+        sink = MemorySink()
+        with recording(sink):
+            self.assertEqual(sinks, [sink])
+        self.assertEqual(sinks, [])
+        self.get_form_class()().as_p()
+        self.assertEqual(sink.measurements, [])
+
+    def test_render(self):
+        Group.objects.create(name='admins')
+        form = self.get_form_class()(initial={'kind': 'choice1'})
+        with recording() as sink:
+            html = force_text(form['kind'])
+            form['group'].as_widget()
+        self.assertEqual(sink.counts(), {'widget.render': 2, 'renderer.render': 2, 'widget.decompress': 2})
+        render = sink.filter('widget.render', 'kind')[0]
+        self.assertEqual(render.bytes, len(html.encode('utf-8')))
+        self.assertEqual(render.choices, 6)
+        self.assertEqual(render.queries, ())
+        self.assertEqual(sink.filter('widget.decompress', 'kind')[0].bytes, None)
+        self.assertEqual(sink.count('renderer.render', 'kind_0'), 1)
+        self.assertEqual(len(sink.filter('widget.render', 'group')[0].queries), 1)
+        self.assertEqual(sum(count for bound, count in sink.histogram('widget.render')), 2)
+
+    def test_name_passed_as_keyword(self):
+        widget = self.get_form_class().base_fields['kind'].widget
+        with recording() as sink:
+            widget.render(name='kind', value=None)
+        self.assertEqual(sink.count('widget.render', 'kind'), 1)
+
+    def test_unevaluated_choices_not_counted(self):
+        field = ChoiceWithOtherField(choices=Group.objects.all(), other_form_field=forms.CharField())
+        with recording() as sink, self.assertNumQueries(0):
+            field.widget.decompress(None)
+        self.assertIsNone(sink.filter('widget.decompress')[0].choices)
+        list(field.choices)
+        with recording() as sink:
+            field.widget.decompress(None)
+        self.assertEqual(sink.filter('widget.decompress')[0].choices, 1)
+
+    def test_clean(self):
+        group = Group.objects.create(name='admins')
+        form = self.get_form_class()(data={'kind_0': 'choice1', 'group_0': OTHER_CHOICE, 'group_1': group.pk})
+        with recording() as sink:
+            self.assertTrue(form.is_valid())
+        self.assertEqual([m.name for m in sink.filter('field.clean')], ['kind', 'group'])
+        self.assertEqual(len(sink.filter('field.clean', 'group')[0].queries), 1)
+
+    def test_render_cache(self):
+        caches['default'].clear()
+        form_class = self.get_form_class(render_cache=RenderCache())
+        with recording() as sink:
+            form_class().as_p()
+            form_class().as_p()
+        self.assertEqual([m.cache for m in sink.filter('widget.render')], ['miss', None, 'hit', None])
+
+
+@skipUnless(DebugToolbar, 'django-debug-toolbar is not installed')
+class TestChoiceWithOtherPanel(TestCase):
+
+    def test_panel(self):
+        from dj_waff.choice_with_other.panels import ChoiceWithOtherPanel
+
+        Group.objects.create(name='admins')
+
+        class PanelForm(forms.Form):
+            kind = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+            group = ChoiceWithOtherField(choices=CHOICES[:-1],
+                                         other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()))
+
+        request = RequestFactory().get('/')
+        panel = ChoiceWithOtherPanel(DebugToolbar(request))
+        panel.enable_instrumentation()
+        PanelForm().as_p()
+        PanelForm(data={'kind_0': 'choice1', 'group_0': 'choice2'}).is_valid()
+        panel.disable_instrumentation()
+        PanelForm().as_p()
+        panel.generate_stats(request, None)
+
+        stats = panel.get_stats()
+        self.assertEqual(sorted(field['name'] for field in stats['fields']), ['group', 'kind'])
+        group = [field for field in stats['fields'] if field['name'] == 'group'][0]
+        self.assertEqual((group['renders'], group['choices'], group['queries']), (1, 6, 1))
+        self.assertEqual([call['kind'] for call in stats['calls']],
+                         ['widget.render', 'widget.render', 'field.clean', 'field.clean'])
+        self.assertIn('2 fields in', panel.nav_subtitle)
+        content = panel.content
+        self.assertIn('auth_group', content)
+        self.assertIn('<td>group</td>', content)
+
+
+class TestChoiceWithOtherAssertions(ChoiceWithOtherAssertionsMixin, TestCase):
+
+    def get_form_class(self):
+        class BudgetForm(forms.Form):
+            kind = ChoiceWithOtherField(choices=CHOICES[:-1], other_form_field=forms.CharField())
+            group = ChoiceWithOtherField(choices=CHOICES[:-1],
+                                         other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()))
+            owner = ChoiceWithOtherField(choices=CHOICES[:-1],
+                                         other_form_field=forms.ModelChoiceField(queryset=Group.objects.all()))
+
+        return BudgetForm
+
+    def test_widget_queries(self):
+        Group.objects.create(name='admins')
+        form = self.get_form_class()()
+        # One query per ModelChoiceField "other" field.
+        self.assertWidgetQueries(form, 2)
+        with self.assertRaisesMessage(AssertionError, '2 queries executed by the widgets, 1 expected'):
+            self.assertWidgetQueries(form, 1)
+
+    def test_widget_queries_of_formset(self):
+        formset = forms.formset_factory(self.get_form_class(), extra=3)()
+        self.assertWidgetQueries(formset, 6)
+        formset = forms.formset_factory(self.get_form_class(), formset=BaseChoiceWithOtherFormSet, extra=3)()
+        # The rows share the evaluated querysets.
+        self.assertWidgetQueries(formset, 2, render=lambda formset: formset.as_p())
+
+    def test_render_under(self):
+        form = self.get_form_class()()
+        self.assertRenderUnder(form, 1000)
+        with self.assertRaisesMessage(AssertionError, 'the budget is 0 ms'):
+            self.assertRenderUnder(form, 0)
+
+    def test_html_bytes_under(self):
+        form = self.get_form_class()()
+        size = len(render_form(form).encode('utf-8'))
+        self.assertHtmlBytesUnder(form, size + 1)
+        with self.assertRaisesMessage(AssertionError, 'The form renders to {} bytes'.format(size)):
+            self.assertHtmlBytesUnder(form, size)
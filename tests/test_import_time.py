@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_import_time
+----------------
+
+Tests of what importing `dj_waff.choice_with_other` loads in a fresh process.
+The import time is measured by ``python -m benchmarks.import_time``.
+"""
+
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase
+
+# Prints the modules that importing dj_waff.choice_with_other adds to a
+# process that already imported django.forms.
+IMPORT_SCRIPT = '''
+import sys
+from django.conf import settings
+settings.configure()
+import django
+django.setup()
+import django.forms
+before = set(sys.modules)
+import dj_waff.choice_with_other
+print(' '.join(sorted(set(sys.modules) - before)))
+'''
+
+# The caching, instrumentation and template modules are only imported by
+# the code using them.
+PACKAGE_MODULES = {
+    'dj_waff',
+    'dj_waff.choice_with_other',
+    'dj_waff.choice_with_other.choices',
+    'dj_waff.choice_with_other.fragments',
+    'dj_waff.choice_with_other.widget_compat',
+}
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_import():
+    """Returns the modules printed by IMPORT_SCRIPT run in a new interpreter."""
+    process = subprocess.Popen([sys.executable, '-c', IMPORT_SCRIPT], cwd=ROOT,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    out, err = process.communicate()
+    if process.returncode:
+        raise AssertionError(err)
+    return set(out.split())
+
+
+class TestImportTime(SimpleTestCase):
+
+    def test_imports_only_what_it_uses(self):
+        modules = run_import()
+        self.assertEqual({module for module in modules if module.split('.')[0] == 'dj_waff'}, PACKAGE_MODULES)
+        self.assertEqual({module for module in modules if module.split('.')[0] != 'dj_waff'}, set())
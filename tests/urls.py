@@ -0,0 +1,13 @@
+from django.conf.urls import url
+from django.contrib.auth.models import Group
+
+from dj_waff.choice_with_other.views import OtherChoicesView
+
+
+class GroupChoicesView(OtherChoicesView):
+    queryset = Group.objects.order_by('pk')
+
+
+urlpatterns = [
+    url(r'^groups/$', GroupChoicesView.as_view(), name='group-choices'),
+]